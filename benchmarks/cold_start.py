@@ -0,0 +1,71 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from benchmarks.configuration_memory import get_configuration_dict
+from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager
+from macro_keyboard_configuration_management.constants import DEFAULT_FILE_NAME, CACHE_FILE_NAME
+
+PROFILE_COUNTS = (100, 1000, 10000)
+RUNS = 5
+
+
+def start(directory: str, cached: bool) -> float:
+    """Creates a ConfigurationManager like the GUI and the listener do when they start, runs in a fresh process per
+    start so the shared key functions of earlier starts are not reused
+    :param directory: the directory holding the configuration directory
+    :param cached: False to remove the cache first, so the configuration file is parsed
+    :return: float, the time of the start in ms
+    """
+    os.chdir(directory)
+    if not cached and os.path.isfile(CACHE_FILE_NAME):
+        os.remove(CACHE_FILE_NAME)
+    started = time.perf_counter()
+    ConfigurationManager()
+    return (time.perf_counter() - started) * 1000
+
+
+def measure(profiles: int, runs: int) -> List[float]:
+    """Measures the start with a configuration file of the given size, without and with the cache
+    :param profiles: the number of profiles in the configuration file
+    :param runs: the number of starts per measurement
+    :return: median start time without and with the cache in ms
+    """
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="macrokeyboard-") as directory:
+        os.mkdir(os.path.join(directory, "configuration"))
+        with open(os.path.join(directory, DEFAULT_FILE_NAME), "w") as file:
+            json.dump(get_configuration_dict(profiles), file)
+        results = []
+        for cached in (False, True):
+            times = []
+            for _ in range(runs):
+                with context.Pool(1) as pool:
+                    times.append(pool.apply(start, (directory, cached)))
+            results.append(statistics.median(times))
+        return results
+
+
+def main() -> None:
+    """Prints the time ConfigurationManager needs to start with large configuration files, once with the cache removed
+    before every start and once with the cache written by the previous start
+    """
+    parser = argparse.ArgumentParser(prog="cold_start")
+    parser.add_argument("--profiles", type=int, nargs="+", default=list(PROFILE_COUNTS),
+                        help="numbers of profiles in the configuration file")
+    parser.add_argument("--runs", type=int, default=RUNS, help="starts per measurement")
+    arguments = parser.parse_args()
+
+    print(f"{'profiles':>8} {'no cache (ms)':>14} {'cache (ms)':>11}")
+    for profiles in arguments.profiles:
+        uncached, cached = measure(profiles, arguments.runs)
+        print(f"{profiles:8d} {uncached:14.1f} {cached:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import json
+import tracemalloc
+from typing import Dict
+
+from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager
+from macro_keyboard_configuration_management.constants import DEFAULT_CONFIG_KEYS
+
+PROFILES = 10000
+ABBREVIATION_EVERY = 3
+
+
+def get_configuration_dict(profiles: int) -> Dict:
+    """Returns the content of a configuration file with many profiles, every third one has an abbreviation
+    :param profiles: the number of profiles
+    :return: Dict mapping the profile names to their keys
+    """
+    configuration_dict = {}
+    for index in range(profiles):
+        keys = dict(DEFAULT_CONFIG_KEYS)
+        if index % ABBREVIATION_EVERY == 0:
+            keys["f13"] = {"name": "mail", "arg": "me@example.com", "function_type": "ABBREVIATION"}
+        configuration_dict[f"profile{index}"] = keys
+    return configuration_dict
+
+
+def main() -> None:
+    """Prints the memory retained by the configurations of a large configuration file and the peak while loading it
+    """
+    parser = argparse.ArgumentParser(prog="configuration_memory")
+    parser.add_argument("--profiles", type=int, default=PROFILES, help="number of profiles in the configuration")
+    arguments = parser.parse_args()
+
+    content = json.dumps(get_configuration_dict(arguments.profiles))
+    tracemalloc.start()
+    configurations = ConfigurationManager.get_configuration_list_from_dict(json.loads(content))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{len(configurations)} profiles: {retained / 2 ** 20:.1f} MiB retained, {peak / 2 ** 20:.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+from macro_keyboard_hub.gui import GUI
+from macro_keyboard_hub.popup.popup import Popup
+
+CLICKS = 20
+ICONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "icons")
+
+
+def wait_mapped(gui: GUI, popup: Popup, started: float) -> float:
+    """Shows a popup and runs the event loop of the GUI until it is mapped
+    :param gui: the running GUI
+    :param popup: the popup that is shown by the click
+    :param started: perf_counter of the click
+    :return: float, the time from the click until the popup is visible in ms
+    """
+    mapped = []
+    binding = popup.bind("<Map>", lambda event: mapped.append(time.perf_counter()) if event.widget is popup else None,
+                         add="+")
+    popup.show()
+    while not mapped:
+        gui.root.update()
+    popup.unbind("<Map>", binding)
+    return (mapped[0] - started) * 1000
+
+
+def click_cached(gui: GUI, key: str) -> float:
+    """Shows the edit popup like handle_button_event does, reconfiguring the popup built at startup
+    :param gui: the running GUI
+    :param key: the key that is clicked
+    :return: float, the click to visible latency in ms
+    """
+    started = time.perf_counter()
+    gui.edit_key = key
+    gui.current_function_label.configure(text=gui.configuration_manager.get_key_function(key).get_name())
+    latency = wait_mapped(gui, gui.edit_popup, started)
+    gui.edit_popup.hide()
+    gui.root.update()
+    return latency
+
+
+def click_rebuilt(gui: GUI, key: str) -> float:
+    """Shows the edit popup like handle_button_event did before the dialogs were reused, building a new popup with
+    all of its widgets on every click
+    :param gui: the running GUI
+    :param key: the key that is clicked
+    :return: float, the click to visible latency in ms
+    """
+    cached_label = gui.current_function_label
+    started = time.perf_counter()
+    popup = gui.create_edit_popup()
+    gui.edit_key = key
+    gui.current_function_label.configure(text=gui.configuration_manager.get_key_function(key).get_name())
+    latency = wait_mapped(gui, popup, started)
+    popup.destroy()
+    gui.current_function_label = cached_label
+    gui.root.update()
+    return latency
+
+
+def report(name: str, latencies: List[float]) -> None:
+    """Prints the distribution of the latencies
+    :param name: the name of the measured path
+    :param latencies: the latencies in ms
+    """
+    print(f"{name:8} p50 {statistics.median(latencies):7.2f} ms   "
+          f"p90 {statistics.quantiles(latencies, n=10)[-1]:7.2f} ms   max {max(latencies):7.2f} ms")
+
+
+def main() -> None:
+    """Prints the latency from clicking a key until its edit popup is visible, for the popup built once at startup and
+    for a popup built on every click as before. Needs a display, e.g.
+    xvfb-run -a python -m benchmarks.popup_latency
+    """
+    parser = argparse.ArgumentParser(prog="popup_latency")
+    parser.add_argument("--clicks", type=int, default=CLICKS, help="clicks measured per path")
+    arguments = parser.parse_args()
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        parser.exit(1, "popup_latency needs a display, e.g. xvfb-run -a python -m benchmarks.popup_latency\n")
+
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="macrokeyboard-") as directory:
+        os.chdir(directory)
+        try:
+            shutil.copytree(ICONS, "icons")
+            gui = GUI()
+            gui.root.update()
+            gui.create_dialogs()
+            gui.root.update()
+            key = next(iter(gui.configuration_manager.get_configuration().keys))
+            report("before", [click_rebuilt(gui, key) for _ in range(arguments.clicks)])
+            report("after", [click_cached(gui, key) for _ in range(arguments.clicks)])
+            gui.root.destroy()
+        finally:
+            os.chdir(working_directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+from macro_keyboard_configuration_management.constants import SEQUENCE_SEPARATOR
+from macro_keyboard_listener.sequence import SequenceMachine
+
+SEQUENCE_COUNTS = (10, 1000, 4000)
+EVENTS = 200000
+HOTKEYS = [f"f{number}" for number in range(13, 21)] + [f"ctrl+f{number}" for number in range(13, 21)]
+
+
+def get_sequences(count: int, min_length: int, max_length: int) -> Dict[str, Callable]:
+    """Returns random sequences of the hotkeys of the MacroKeyboard
+    :param count: the number of sequences
+    :param min_length: the minimal number of hotkeys per sequence
+    :param max_length: the maximal number of hotkeys per sequence
+    :return: Dict mapping the sequences to an action doing nothing
+    """
+    sequences = {}
+    while len(sequences) < count:
+        steps = [random.choice(HOTKEYS) for _ in range(random.randint(min_length, max_length))]
+        sequences[f"{SEQUENCE_SEPARATOR} ".join(steps)] = lambda: None
+    return sequences
+
+
+def measure(sequences: Dict[str, Callable], events: List[str]) -> float:
+    """Feeds the events into a machine compiled from the sequences
+    :param sequences: the sequences of the machine
+    :param events: the hotkeys pressed
+    :return: float, the time per event in microseconds
+    """
+    machine = SequenceMachine(sequences, timeout=10)
+    started = time.perf_counter()
+    for event in events:
+        machine.feed(event)
+    elapsed = time.perf_counter() - started
+    machine.timer_wheel.stop()
+    return elapsed / len(events) * 1e6
+
+
+def main() -> None:
+    """Prints the cost of a key event for growing numbers of sequences, once with sequences of four hotkeys, where no
+    prefix has an action, and once with sequences of two to four hotkeys, where many prefixes have one and start the
+    timeout
+    """
+    parser = argparse.ArgumentParser(prog="sequences")
+    parser.add_argument("--sequences", type=int, nargs="+", default=list(SEQUENCE_COUNTS),
+                        help="numbers of sequences to measure")
+    parser.add_argument("--events", type=int, default=EVENTS, help="key events fed per measurement")
+    arguments = parser.parse_args()
+
+    print(f"{'sequences':>9} {'4 steps (us/event)':>19} {'2-4 steps (us/event)':>21}")
+    for count in arguments.sequences:
+        results = []
+        for min_length in (4, 2):
+            random.seed(1)
+            sequences = get_sequences(count, min_length, 4)
+            events = [random.choice(HOTKEYS) for _ in range(arguments.events)]
+            results.append(measure(sequences, events))
+        print(f"{count:9d} {results[0]:19.2f} {results[1]:21.2f}")
+
+
+if __name__ == "__main__":
+    main()
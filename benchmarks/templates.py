@@ -0,0 +1,62 @@
+import argparse
+import time
+from typing import Callable, List
+
+from macro_keyboard_configuration_management.template import Template
+
+TEXT_SIZE = 15000
+FIELD_COUNTS = (0, 200)
+RUNS = 2000
+# the clipboard is left out, reading it needs Windows
+FIELDS = ["{date}", "{time:%H:%M}", "{datetime}", "{counter:benchmark}", "{env:HOME}"]
+
+
+def get_text(size: int, fields: int, suffix: str = "") -> str:
+    """Returns an abbreviation text of a given size with fields spread evenly over it
+    :param size: the number of characters of the literal text
+    :param fields: the number of fields
+    :param suffix: appended to make the text distinct, so it is not found in the template cache
+    :return: str, the text
+    """
+    words = ("lorem ipsum dolor sit amet 100% " * (size // 32 + 1))[:size]
+    if not fields:
+        return words + suffix
+    part = size // fields
+    return "".join(words[index * part:(index + 1) * part] + FIELDS[index % len(FIELDS)]
+                   for index in range(fields)) + suffix
+
+
+def measure(function: Callable, arguments: List) -> float:
+    """Calls a function once for every argument
+    :param function: the measured function
+    :param arguments: the arguments of the calls
+    :return: float, the time per call in microseconds
+    """
+    started = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - started) / len(arguments) * 1e6
+
+
+def main() -> None:
+    """Prints the cost of parsing an abbreviation text, of compiling a text that was compiled before and of
+    expanding the compiled template, the expansion runs on every press of the key
+    """
+    parser = argparse.ArgumentParser(prog="templates")
+    parser.add_argument("--size", type=int, default=TEXT_SIZE, help="characters of the abbreviation text")
+    parser.add_argument("--fields", type=int, nargs="+", default=list(FIELD_COUNTS), help="fields per text")
+    parser.add_argument("--runs", type=int, default=RUNS, help="runs per measurement")
+    arguments = parser.parse_args()
+
+    print(f"{'fields':>6} {'parse (us)':>11} {'cached compile (us)':>20} {'expansion (us)':>15}")
+    for fields in arguments.fields:
+        texts = [get_text(arguments.size, fields, f" {run}") for run in range(arguments.runs)]
+        parse = measure(Template.compile, texts)
+        cached = measure(Template.compile, texts)
+        templates = [Template.compile(text) for text in texts]
+        expansion = measure(Template.render, templates)
+        print(f"{fields:6d} {parse:11.2f} {cached:20.2f} {expansion:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager, KeyFunction, \
+    FunctionType
+from macro_keyboard_configuration_management.constants import DEFAULT_CONFIG_KEYS, VAULT, VAULT_SEPARATOR
+from macro_keyboard_configuration_management.vault import AbbreviationVault
+
+ENTRY_COUNTS = (0, 100, 1000, 10000)
+CONFIGURATIONS = 100
+REFERENCES_PER_CONFIGURATION = 14
+RUNS = 20
+PASSPHRASE = "benchmark"
+
+
+def get_reference(entry_id: str) -> str:
+    """Returns the reference to an entry of the vault
+    :param entry_id: the id of the entry
+    :return: str, the reference
+    """
+    return f"{VAULT}{VAULT_SEPARATOR}{entry_id}"
+
+
+def write_vault(entries: int) -> List[str]:
+    """Writes a vault with the given number of entries, all copies of one encrypted text
+    :param entries: the number of entries
+    :return: the references to the entries
+    """
+    vault = AbbreviationVault(passphrase=PASSPHRASE)
+    if not entries:
+        return []
+    reference = vault.store("mail@example.com")
+    ciphertext = vault.entries.pop(reference[len(get_reference("")):])
+    for number in range(entries - 1):
+        vault.entries[f"{number:016x}"] = ciphertext
+    # store writes all entries, the copies added above and the new one
+    vault.store("mail@example.com")
+    return [get_reference(entry_id) for entry_id in vault.entries]
+
+
+def write_configurations() -> None:
+    """Writes the configurations, they are the same for every size of the vault and refer to entries that are missing
+    in the smaller vaults
+    """
+    manager = ConfigurationManager()
+    for index in range(CONFIGURATIONS):
+        manager.add_new_configuration(f"configuration{index}")
+        for position, key in enumerate(list(DEFAULT_CONFIG_KEYS)[:REFERENCES_PER_CONFIGURATION]):
+            number = index * REFERENCES_PER_CONFIGURATION + position
+            manager.update_key(key, KeyFunction(get_reference(f"{number:016x}"), FunctionType.ABBREVIATION,
+                                                name=f"secret{number}"))
+
+
+def measure(entries: int) -> List[float]:
+    """Measures the startup and the reload of the configurations and the expansion of encrypted abbreviations, in
+    the current directory
+    :param entries: the number of entries in the vault
+    :return: startup, reload, first expansion and decrypting every entry in ms
+    """
+    references = write_vault(entries)
+    write_configurations()
+    ConfigurationManager()
+
+    startups = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        manager = ConfigurationManager()
+        AbbreviationVault(passphrase=PASSPHRASE)
+        startups.append(time.perf_counter() - started)
+    reloads = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        manager.read_configuration()
+        reloads.append(time.perf_counter() - started)
+    if not references:
+        return [statistics.median(startups) * 1000, statistics.median(reloads) * 1000, 0.0, 0.0]
+
+    vault = AbbreviationVault(passphrase=PASSPHRASE)
+    started = time.perf_counter()
+    vault.get(references[0])
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    for reference in references:
+        vault.get(reference)
+    decrypt_all = time.perf_counter() - started
+    vault.wipe()
+    return [statistics.median(startups) * 1000, statistics.median(reloads) * 1000, first * 1000, decrypt_all * 1000]
+
+
+def main() -> None:
+    """Prints how startup and reload of the configurations and the expansion of encrypted abbreviations change with
+    the size of the vault. The configurations hold the same number of references for every vault size. Decrypting
+    every entry is what reading the vault eagerly would add to the startup
+    """
+    parser = argparse.ArgumentParser(prog="vault")
+    parser.add_argument("--entries", type=int, nargs="+", default=list(ENTRY_COUNTS), help="vault sizes to measure")
+    arguments = parser.parse_args()
+
+    working_directory = os.getcwd()
+    results = {}
+    for entries in arguments.entries:
+        with tempfile.TemporaryDirectory(prefix="macrokeyboard-") as directory:
+            os.chdir(directory)
+            try:
+                os.mkdir("configuration")
+                results[entries] = measure(entries)
+            finally:
+                os.chdir(working_directory)
+
+    print(f"{'vault entries':20}" + "".join(f"{entries:>10}" for entries in results))
+    for row, name in enumerate(("startup (ms)", "reload (ms)", "first expansion (ms)", "decrypt all (ms)")):
+        print(f"{name:20}" + "".join(f"{values[row]:10.2f}" for values in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from typing import List, Tuple
+
+import customtkinter as ctk
+
+from macro_keyboard_hub.virtual_grid import VirtualGrid
+
+KEY_COUNTS = (16, 100, 1000)
+COLUMNS = 4
+REFRESHES = 20
+
+
+def get_rss() -> float:
+    """Returns the resident set size of the process
+    :return: float, the resident set size in MiB
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # the peak instead of the current size, in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def count_widgets(widget) -> int:
+    """Counts the Tk widgets below a widget, including the widgets customtkinter creates internally
+    :param widget: the widget to start at
+    :return: int, the number of widgets below it
+    """
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def get_rows(keys: int, refresh: int) -> List[List[Tuple[str, str]]]:
+    """Returns the rows of a layout with the given number of keys, the texts change with every refresh like they do
+    when the GUI switches the configuration
+    :param keys: the number of keys
+    :param refresh: the number of the refresh
+    :return: rows of (key, text) tuples
+    """
+    cells = [(f"key{index}", f"function {index} / {refresh}") for index in range(keys)]
+    return [cells[index:index + COLUMNS] for index in range(0, keys, COLUMNS)]
+
+
+def build_buttons(frame: ctk.CTkFrame, rows: List[List[Tuple[str, str]]]) -> None:
+    """Rebuilds the grid like update_buttons did before the grid was virtualized, one frame per row and one button
+    per key, all destroyed and created again on every refresh
+    :param frame: the frame holding the grid
+    :param rows: rows of (key, text) tuples
+    """
+    for child in frame.winfo_children():
+        child.destroy()
+    for row in rows:
+        row_frame = ctk.CTkFrame(frame)
+        row_frame.pack(fill=ctk.BOTH, expand=True)
+        for key, text in row:
+            button = ctk.CTkButton(row_frame, text=text, command=lambda k=key: None, corner_radius=10,
+                                   fg_color="#2E2E2E", hover_color="#3E3E3E", height=50)
+            button.pack(side=ctk.LEFT, padx=5, pady=5, fill=ctk.BOTH, expand=True)
+
+
+def measure(grid: str, keys: int) -> Tuple[int, float, float, float]:
+    """Builds a window with a grid of the given size and refreshes it, runs in a fresh process per case so the
+    resident set sizes do not include earlier cases
+    :param grid: "virtual" for the VirtualGrid of the GUI, "buttons" for one button per key
+    :param keys: the number of keys
+    :return: widget count, time of the first render and of later refreshes in ms and resident set size in MiB
+    """
+    root = ctk.CTk()
+    root.geometry("700x500")
+    if grid == "virtual":
+        frame = VirtualGrid(root, command=lambda key: None, corner_radius=10)
+        refresh = frame.set_rows
+    else:
+        frame = ctk.CTkFrame(root)
+        refresh = lambda rows: build_buttons(frame, rows)
+    frame.pack(padx=10, pady=10, fill=ctk.BOTH, expand=True)
+    root.update()
+
+    started = time.perf_counter()
+    refresh(get_rows(keys, 0))
+    root.update()
+    first = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for index in range(1, REFRESHES + 1):
+        refresh(get_rows(keys, index))
+        root.update()
+    refreshed = (time.perf_counter() - started) * 1000 / REFRESHES
+
+    widgets = count_widgets(root)
+    rss = get_rss()
+    root.destroy()
+    return widgets, first, refreshed, rss
+
+
+def main() -> None:
+    """Prints widget count, render time and resident set size of the key grid for growing layouts, needs a display,
+    e.g. xvfb-run -a python -m benchmarks.virtual_grid from the root of the repository
+    """
+    parser = argparse.ArgumentParser(prog="virtual_grid")
+    parser.add_argument("--keys", type=int, nargs="+", default=list(KEY_COUNTS), help="layout sizes to measure")
+    parser.add_argument("--grid", choices=("virtual", "buttons"), nargs="+", default=["buttons", "virtual"],
+                        help="the grids to measure, buttons is the grid before it was virtualized")
+    arguments = parser.parse_args()
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        parser.exit(1, "virtual_grid needs a display, e.g. xvfb-run -a python -m benchmarks.virtual_grid\n")
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'grid':8} {'keys':>6} {'widgets':>8} {'first (ms)':>11} {'refresh (ms)':>13} {'rss (MiB)':>10}")
+    for grid in arguments.grid:
+        for keys in arguments.keys:
+            with context.Pool(1) as pool:
+                widgets, first, refreshed, rss = pool.apply(measure, (grid, keys))
+            print(f"{grid:8} {keys:6d} {widgets:8d} {first:11.1f} {refreshed:13.1f} {rss:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import logging
+import mmap
+import os
+import struct
+from typing import Optional, Tuple
+
+from macro_keyboard_configuration_management.constants import STATE_NAME_LENGTH, STATE_READ_RETRIES
+
+# sequence counter, configuration index, lock state, length of the name, name
+STATE_FORMAT = struct.Struct(f"<IiBxH{STATE_NAME_LENGTH}s")
+SEQUENCE_FORMAT = struct.Struct("<I")
+
+
+class ActiveState:
+
+    def __init__(self, path: str) -> None:
+        """Small memory mapped region shared by listener and GUI holding the active configuration and lock state.
+        The listener writes it, readers never lock but retry while the sequence counter is odd or changed during the
+        read (seqlock)
+        :param path: the path of the state file
+        """
+        self.path = path
+        self.memory: Optional[mmap.mmap] = None
+
+    def write(self, index: int, name: str, locked: bool) -> None:
+        """Publishes the active configuration, only called by the listener. Nothing is written if the state did not
+        change, readers switch to the published configuration whenever the sequence counter changes
+        :param index: the index of the active configuration
+        :param name: the name of the active configuration
+        :param locked: whether the configuration is locked
+        """
+        if not self.__open():
+            return
+        encoded = name.encode("utf-8")[:STATE_NAME_LENGTH]
+        sequence, published_index, published_locked, length, published_name = STATE_FORMAT.unpack_from(self.memory, 0)
+        if sequence and not sequence % 2 and (published_index, bool(published_locked), published_name[:length]) == \
+                (index, locked, encoded):
+            return
+        if sequence % 2:
+            sequence = sequence + 1
+        SEQUENCE_FORMAT.pack_into(self.memory, 0, sequence + 1)
+        STATE_FORMAT.pack_into(self.memory, 0, sequence + 1, index, locked, len(encoded), encoded)
+        SEQUENCE_FORMAT.pack_into(self.memory, 0, sequence + 2)
+
+    def get_sequence(self) -> int:
+        """Returns the sequence counter, it changes with every write and is cheap enough to poll
+        :return: int, the current sequence counter, 0 if nothing was written yet
+        """
+        if not self.__open():
+            return 0
+        return SEQUENCE_FORMAT.unpack_from(self.memory, 0)[0]
+
+    def read(self) -> Optional[Tuple[int, int, str, bool]]:
+        """Reads a consistent copy of the state without locking
+        :return: tuple of sequence, index, name and lock state or None if nothing consistent was written yet
+        """
+        if not self.__open():
+            return None
+        for _ in range(STATE_READ_RETRIES):
+            sequence, index, locked, length, encoded = STATE_FORMAT.unpack_from(self.memory, 0)
+            if sequence == 0 or sequence % 2:
+                continue
+            if SEQUENCE_FORMAT.unpack_from(self.memory, 0)[0] == sequence:
+                return sequence, index, encoded[:length].decode("utf-8", errors="ignore"), bool(locked)
+        return None
+
+    def __open(self) -> bool:
+        """Maps the state file, creating it with the right size if necessary
+        :return: True if the state is mapped
+        """
+        if self.memory is not None:
+            return True
+        try:
+            if not os.path.isfile(self.path) or os.path.getsize(self.path) < STATE_FORMAT.size:
+                with open(self.path, "wb") as file:
+                    file.write(bytes(STATE_FORMAT.size))
+            with open(self.path, "r+b") as file:
+                self.memory = mmap.mmap(file.fileno(), STATE_FORMAT.size)
+            return True
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not map active state {self.path}: {e}")
+            return False
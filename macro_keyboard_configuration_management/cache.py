@@ -0,0 +1,46 @@
+import logging
+import marshal
+import os
+from typing import List, Optional
+
+from macro_keyboard_configuration_management.constants import CACHE_FILE_NAME, CACHE_FORMAT_VERSION
+
+
+class ConfigurationCache:
+
+    def __init__(self, path: str = CACHE_FILE_NAME) -> None:
+        """On-disk cache of the already parsed configurations, keyed by the digest of the configuration sources and
+        the cache format version, so a cold start can skip parsing the snapshot and replaying the journal
+        :param path: the path of the cache file
+        """
+        self.path = path
+
+    def load(self, digest: str) -> Optional[List]:
+        """Loads the cached configurations in a single read if they were built from the given sources
+        :param digest: the digest of the configuration sources
+        :return: list of (name, [(key, arg, function_type, function_name, repeat), ...]) entries or None if the cache
+        is invalid
+        """
+        try:
+            with open(self.path, "rb") as file:
+                version, cached_digest, configurations = marshal.loads(file.read())
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logging.debug(f"Configuration cache not usable: {e}")
+            return None
+        if version != CACHE_FORMAT_VERSION or cached_digest != digest:
+            logging.debug("Configuration cache is outdated")
+            return None
+        return configurations
+
+    def store(self, digest: str, configurations: List) -> None:
+        """Stores the parsed configurations for the given sources
+        :param digest: the digest of the configuration sources
+        :param configurations: list of (name, [(key, arg, function_type, function_name, repeat), ...]) entries
+        """
+        temporary_path = self.path + ".tmp"
+        try:
+            with open(temporary_path, "wb") as file:
+                file.write(marshal.dumps((CACHE_FORMAT_VERSION, digest, configurations)))
+            os.replace(temporary_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not write configuration cache: {e}")
@@ -1,12 +1,23 @@
 import json
+import math
 import os
+import sys
 import time
 from enum import Enum
 from json import JSONDecodeError
 from os.path import isfile
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
-from macro_keyboard_configuration_management.constants import DEFAULT_FILE_NAME, DEFAULT_CONFIG_KEYS
+from macro_keyboard_configuration_management.constants import DEFAULT_DEVICE_NAME, DEFAULT_LAYOUT, \
+    JOURNAL_COMPACTION_SIZE, JOURNAL_SET_KEY, JOURNAL_ADD_CONFIG, JOURNAL_DELETE_CONFIG, JOURNAL_RESET, REPEAT_DELAY, \
+    REPEAT_RATE
+from macro_keyboard_configuration_management.active_state import ActiveState
+from macro_keyboard_configuration_management.cache import ConfigurationCache
+from macro_keyboard_configuration_management.device import Device
+from macro_keyboard_configuration_management.journal import ConfigurationJournal
+from macro_keyboard_configuration_management.profile_index import ProfileIndex
+from macro_keyboard_configuration_management.template import Template
+from macro_keyboard_configuration_management.vault import AbbreviationVault
 import logging
 
 
@@ -18,14 +29,137 @@ class FunctionType(str, Enum):
     ABBREVIATION = "ABBREVIATION"
 
 
+class RepeatMode(str, Enum):
+    """What happens while the key of a function is held down
+    """
+    NONE = "NONE"
+    OS = "OS"
+    CUSTOM = "CUSTOM"
+
+
+class RepeatPolicy:
+    """Repeat behaviour of a KeyFunction, instances are never changed after creation
+    """
+    __slots__ = ("mode", "delay", "rate", "acceleration", "max_rate")
+
+    def __init__(self, mode=RepeatMode.OS, delay: float = REPEAT_DELAY, rate: float = REPEAT_RATE,
+                 acceleration: float = 1.0, max_rate: float = None) -> None:
+        """Creates a repeat policy, the values besides the mode are only used by CUSTOM policies
+        :param mode: NONE runs the function once per press, OS runs it for every repeated key event of the operating
+        system and CUSTOM repeats it at the given rate
+        :param delay: seconds between the press and the first repetition of a CUSTOM policy
+        :param rate: repetitions per second of a CUSTOM policy
+        :param acceleration: factor the rate is multiplied with after every repetition
+        :param max_rate: the rate acceleration stops at, unlimited if not given
+        """
+        self.mode = RepeatMode(mode)
+        self.delay = delay
+        self.rate = rate
+        self.acceleration = acceleration
+        self.max_rate = max_rate
+
+    def get_interval(self, repetition: int) -> float:
+        """Returns the seconds between a repetition and the next one
+        :param repetition: the number of repetitions that already ran
+        :return: float, the interval
+        """
+        rate = self.rate * self.acceleration ** repetition
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+        return 1 / rate
+
+    def to_tuple(self) -> Tuple:
+        """Maps RepeatPolicy to the tuple used as key of shared KeyFunctions and in the configuration cache
+        :return: tuple of the values in the order of the constructor
+        """
+        return self.mode.value, self.delay, self.rate, self.acceleration, self.max_rate
+
+    def to_dict(self) -> Dict:
+        """Maps RepeatPolicy to dictionary
+        :return: Dict representing this RepeatPolicy
+        """
+        return {
+            "mode": self.mode.value,
+            "delay": self.delay,
+            "rate": self.rate,
+            "acceleration": self.acceleration,
+            "max_rate": self.max_rate
+        }
+
+    @staticmethod
+    def from_dict(policy_dict: Dict) -> 'RepeatPolicy':
+        """Maps dictionary to RepeatPolicy, missing values get their defaults. The dictionary may be edited by hand, so
+        an invalid one is logged and replaced by the default policy instead of stopping the listener
+        :param policy_dict: dictionary representing a RepeatPolicy
+        :return: RepeatPolicy for the dictionary, DEFAULT_REPEAT_POLICY if it is invalid
+        """
+        error = RepeatPolicy.__validate(policy_dict)
+        if error is not None:
+            logging.warning(f"Ignoring invalid repeat policy {policy_dict}: {error}")
+            return DEFAULT_REPEAT_POLICY
+        values = dict(policy_dict)
+        if "mode" in values:
+            values["mode"] = values["mode"].upper()
+        return RepeatPolicy(**values)
+
+    @staticmethod
+    def __validate(policy_dict: Dict) -> Optional[str]:
+        """Checks a dictionary representing a RepeatPolicy
+        :param policy_dict: dictionary representing a RepeatPolicy
+        :return: str describing the first problem or None if the dictionary is valid
+        """
+        if not isinstance(policy_dict, dict):
+            return "not an object"
+        unknown = set(policy_dict) - {"mode", "delay", "rate", "acceleration", "max_rate"}
+        if unknown:
+            return f"unknown entries {', '.join(sorted(unknown))}"
+        mode = policy_dict.get("mode", RepeatMode.OS.value)
+        if not isinstance(mode, str) or mode.upper() not in RepeatMode.__members__:
+            return f"mode has to be one of {', '.join(RepeatMode.__members__)}"
+        for name, inclusive in (("delay", True), ("rate", False), ("acceleration", False), ("max_rate", False)):
+            if name not in policy_dict or (name == "max_rate" and policy_dict[name] is None):
+                continue
+            value = policy_dict[name]
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or \
+                    value < 0 or (value == 0 and not inclusive):
+                return f"{name} has to be a finite number {'of at least' if inclusive else 'greater than'} 0"
+        return None
+
+
+DEFAULT_REPEAT_POLICY = RepeatPolicy()
+
+
 class KeyFunction:
-    """Represents the Function of a Key
+    """Represents the Function of a Key, instances are never changed after creation and can therefore be shared.
+    The text of an abbreviation is compiled into a Template once, when the KeyFunction is created, texts stored in the
+    vault are written as they are
     """
+    __slots__ = ("arg", "function_type", "name", "template", "repeat")
 
-    def __init__(self, arg: str, function_type=FunctionType.MACRO, name: str = None) -> None:
+    def __init__(self, arg: str, function_type=FunctionType.MACRO, name: str = None,
+                 repeat: RepeatPolicy = DEFAULT_REPEAT_POLICY) -> None:
         self.arg = arg
         self.function_type = function_type
         self.name = name
+        self.repeat = repeat
+        self.template = Template.compile(arg) if function_type == FunctionType.ABBREVIATION \
+            and not AbbreviationVault.is_reference(arg) else None
+
+    @staticmethod
+    def shared(arg: str, function_type: str, name: str = None, repeat: Tuple = None) -> 'KeyFunction':
+        """Returns the shared KeyFunction instance for the given values, creating it on first use
+        :param arg: the argument of the function
+        :param function_type: the value of the FunctionType
+        :param name: the displayable name of the function
+        :param repeat: the tuple of the RepeatPolicy, the default policy if not given
+        :return: KeyFunction shared by all keys with the same function
+        """
+        function = _shared_key_functions.get((arg, function_type, name, repeat))
+        if function is None:
+            policy = RepeatPolicy(*repeat) if repeat is not None else DEFAULT_REPEAT_POLICY
+            function = KeyFunction(sys.intern(arg), FunctionType(function_type), name, policy)
+            _shared_key_functions[(arg, function_type, name, repeat)] = function
+        return function
 
     def get_name(self) -> str:
         """Returns the displayable name for the KeyFunction
@@ -39,14 +173,39 @@ class KeyFunction:
         """Maps KeyFunction to dictionary
         :return: Dict representing this KeyFunction
         """
-        return {
+        function_dict = {
             "name": self.name,
             "arg": self.arg,
             "function_type": self.function_type.name
         }
+        if self.repeat is not DEFAULT_REPEAT_POLICY:
+            function_dict["repeat"] = self.repeat.to_dict()
+        return function_dict
+
+    def get_repeat_tuple(self) -> Optional[Tuple]:
+        """Returns the tuple of the RepeatPolicy as stored in the configuration cache
+        :return: tuple of the policy or None for the default policy
+        """
+        return None if self.repeat is DEFAULT_REPEAT_POLICY else self.repeat.to_tuple()
+
+    @staticmethod
+    def from_dict(function_dict: Dict) -> 'KeyFunction':
+        """Maps dictionary to KeyFunction
+        :param function_dict: dictionary representing a KeyFunction
+        :return: KeyFunction for the dictionary
+        """
+        repeat = function_dict.get("repeat")
+        policy = RepeatPolicy.from_dict(repeat) if repeat is not None else DEFAULT_REPEAT_POLICY
+        return KeyFunction.shared(function_dict["arg"], function_dict["function_type"], function_dict.get("name"),
+                                  None if policy is DEFAULT_REPEAT_POLICY else policy.to_tuple())
+
+
+_shared_key_functions: Dict[Tuple[str, str, Optional[str], Optional[Tuple]], KeyFunction] = {}
 
 
 class Configuration:
+    __slots__ = ("name", "keys")
+
     def __init__(self, name: str, keys: Dict[str, KeyFunction]) -> None:
         """Represents a configuration for the MacroKeyboard
         :param name: the name of this representation
@@ -58,16 +217,28 @@ class Configuration:
 
 class ConfigurationManager:
 
-    def __init__(self):
+    def __init__(self, device: Device = None):
         """Handles persistence of Configurations and changes, used by GUI and Listener without synchronization of
         indices, but with synchronized configurations
+        :param device: the device whose configurations are managed, the default device if not given
         """
+        self.device = device if device is not None else Device(DEFAULT_DEVICE_NAME, DEFAULT_LAYOUT)
+        self.file_name, journal_file_name, cache_file_name = self.device.get_file_names()
         self.locked_configuration = False
         self.configurations: List[Configuration] = []
         self.configuration_index = 0
+        self.journal = ConfigurationJournal(journal_file_name)
+        self.cache = ConfigurationCache(cache_file_name)
+        self.profile_index: Optional[ProfileIndex] = None
+        self.active_state = ActiveState(self.device.get_state_file_name())
+        self.snapshot_digest = None
+        self.snapshot_stat = None
+        self.journal_merged = False
+        self.undo_stack: List[Tuple[Dict, Dict]] = []
+        self.redo_stack: List[Tuple[Dict, Dict]] = []
+        self.read_error_counter = 0
         self.__update_config()
         logging.info("Configuration Manager initialized")
-        self.read_error_counter = 0
 
     def toggle_configuration_lock(self) -> bool:
         """Toggles configuration lock
@@ -98,16 +269,103 @@ class ConfigurationManager:
         logging.info(f"No configuration set for process {process} because there was none available")
         return False
 
+    def publish_active_state(self) -> None:
+        """Publishes the active configuration and lock state for other processes, used by the listener
+        """
+        if self.configurations:
+            self.active_state.write(self.configuration_index, self.get_configuration().name, self.locked_configuration)
+
+    def follow_active_state(self, last_sequence: int) -> int:
+        """Switches to the configuration another process published, if it published a new one since last_sequence
+        :param last_sequence: the sequence counter seen at the last call
+        :return: the sequence counter of the state now followed
+        """
+        if self.active_state.get_sequence() == last_sequence:
+            return last_sequence
+        state = self.active_state.read()
+        if state is None:
+            return last_sequence
+        sequence, index, name, locked = state
+        self.locked_configuration = locked
+        position = self.__find_configuration(name)
+        if position is not None:
+            self.configuration_index = position
+        elif 0 <= index < len(self.configurations):
+            self.configuration_index = index
+        return sequence
+
+    def get_profile_index(self) -> ProfileIndex:
+        """Returns the search index over the current configurations, it is rebuilt after the configurations changed
+        :return: ProfileIndex of the configurations
+        """
+        if self.profile_index is None:
+            self.profile_index = ProfileIndex(self.configurations)
+        return self.profile_index
+
+    def search_configurations(self, query: str, limit: int = 10) -> List[Configuration]:
+        """Returns the configurations best matching a fuzzy query on their names and the names of their key functions
+        :param query: the text to search for
+        :param limit: the maximum number of results
+        :return: list of Configurations, best match first
+        """
+        return [self.configurations[position] for position in self.get_profile_index().search(query, limit)]
+
+    def jump_to_configuration(self, query: str) -> bool:
+        """Switches directly to the configuration best matching a fuzzy query, an empty query matches every
+        configuration and does not switch at all
+        :param query: the text to search for
+        :return: True if the active configuration changed
+        """
+        query = query.strip()
+        if not query:
+            logging.debug("Ignoring jump without a query")
+            return False
+        positions = self.get_profile_index().search(query, limit=1)
+        if not positions:
+            logging.info(f"No configuration matches {query}")
+            return False
+        if positions[0] == self.configuration_index:
+            logging.debug(f"Configuration matching {query} is already active")
+            return False
+        self.configuration_index = positions[0]
+        logging.info(f"Jumping to configuration at index {self.configuration_index} "
+                     f"with name {self.configurations[self.configuration_index].name}")
+        return True
+
     def read_configuration(self) -> None:
-        """Reads the configuration file and updates the configurations list
+        """Reads the configuration snapshot, replays the edit journal on top of it and updates the configurations list
         """
-        while not isfile(DEFAULT_FILE_NAME) and os.access(DEFAULT_FILE_NAME, os.R_OK):
+        while not isfile(self.file_name) and os.access(self.file_name, os.R_OK):
             pass
-        with open(DEFAULT_FILE_NAME, "r") as file:
+        with open(self.file_name, "rb") as file:
             try:
-                configs: Dict = json.load(file)
-                self.configurations.clear()
-                self.configurations = self.get_configuration_list_from_dict(configs)
+                snapshot = file.read()
+                self.snapshot_stat = self.__get_snapshot_stat()
+                self.snapshot_digest = self.journal.get_digest(snapshot)
+                journal_content = self.journal.load()
+                # a journal written for another snapshot holds edits the snapshot does not know, e.g. because the
+                # snapshot was edited by hand, they are replayed on the new snapshot until the next edit writes both
+                journal_snapshot = self.journal.get_snapshot(journal_content)
+                self.journal_merged = journal_snapshot is not None and journal_snapshot != self.snapshot_digest \
+                    and journal_content.count(b"\n") > 1
+                source_digest = self.journal.get_digest(self.snapshot_digest.encode() + journal_content)
+                cached = self.cache.load(source_digest)
+                if cached is not None:
+                    self.configurations = self.get_configuration_list_from_cache(cached)
+                    logging.debug("Configurations loaded from cache")
+                else:
+                    configs: Dict = json.loads(snapshot)
+                    self.configurations.clear()
+                    self.configurations = self.get_configuration_list_from_dict(configs)
+                    operations = self.journal.read(None, journal_content)
+                    for operation in operations:
+                        self.__apply_operation(operation)
+                    if self.journal_merged:
+                        logging.warning(f"Configuration file {self.file_name} was changed outside of the hub, "
+                                        f"merged {len(operations)} journal operations into it")
+                    logging.debug(f"Replayed {len(operations)} journal operations")
+                    self.cache.store(source_digest, self.get_cache_from_configuration_list(self.configurations))
+                self.profile_index = None
                 self.read_error_counter = 0
             except JSONDecodeError as jde:
                 logging.warning(jde)
@@ -127,13 +385,40 @@ class ConfigurationManager:
             key_dict = {}
             config = configuration_dict[configuration_name]
             for key in config.keys():
-                name, arg, function_type = config[key].values()
-                key_dict[key] = KeyFunction(arg, FunctionType(function_type), name)
+                key_dict[sys.intern(key)] = KeyFunction.from_dict(config[key])
             configurations.append(
                 Configuration(name=configuration_name, keys=key_dict)
             )
         return configurations
 
+    @staticmethod
+    def get_configuration_list_from_cache(cache: List) -> List[Configuration]:
+        """Returns a list of configurations for the entries of the configuration cache
+        :param cache: list of cached configuration entries
+        :return: list of Configurations
+        """
+        return [
+            Configuration(name=configuration_name, keys={
+                sys.intern(key): KeyFunction.shared(arg, function_type, name, repeat)
+                for key, arg, function_type, name, repeat in keys
+            })
+            for configuration_name, keys in cache
+        ]
+
+    @staticmethod
+    def get_cache_from_configuration_list(configurations: List[Configuration]) -> List:
+        """Returns the entries of the configuration cache for a list of configurations
+        :param configurations: list of Configurations
+        :return: list of cached configuration entries
+        """
+        return [
+            (config.name, [
+                (key, function.arg, function.function_type.value, function.name, function.get_repeat_tuple())
+                for key, function in config.keys.items()
+            ])
+            for config in configurations
+        ]
+
     def get_configuration(self) -> Configuration:
         """Returns the currently active configuration for this instance
         :return: Configuration that is currently active
@@ -157,26 +442,41 @@ class ConfigurationManager:
                          f"with name {self.configurations[self.configuration_index].name}")
 
     # GUI Functions
-    def add_new_configuration(self, name: str) -> None:
-        """Adds a new configuration with the default function mapping
+    def add_new_configuration(self, name: str) -> bool:
+        """Adds a new configuration with the function mapping of the currently active configuration. Names have to be
+        unique, since the journal and the listener find configurations by their name
         :param name: the name for the new configuration
+        :return: True if the configuration was added, False if there already is one with this name
         """
+        if self.__find_configuration(name) is not None:
+            logging.warning(f"Not adding configuration {name}, a configuration with this name already exists")
+            return False
         logging.debug(f"Adding configuration {name}")
-        self.configurations.append(
-            Configuration(name=name, keys=self.configurations[self.configuration_index].keys)
-        )
+        self.__edit({
+            "op": JOURNAL_ADD_CONFIG,
+            "name": name,
+            "index": len(self.configurations),
+            "keys": self.__keys_to_dict(self.configurations[self.configuration_index].keys)
+        })
         self.configuration_index = len(self.configurations) - 1
-        self.__save_configurations()
         logging.info(f"Added configuration {name}")
+        return True
 
     def delete_current_configuration(self) -> None:
         """Deletes the currently active Configuration
         """
-        if len(self.configurations) > 1:
-            deleted = self.configurations.pop(self.configuration_index)
-            self.configuration_index = (self.configuration_index - 1) % len(self.configurations)
-            self.__save_configurations()
-            logging.info(f"Deleted configuration {deleted.name}")
+        self.delete_configuration(self.configurations[self.configuration_index].name)
+
+    def delete_configuration(self, name: str) -> None:
+        """Deletes the configuration with the given name, the active configuration stays active unless it is deleted
+        :param name: the name of the configuration to delete
+        """
+        index = self.__find_configuration(name)
+        if index is not None and len(self.configurations) > 1:
+            self.__edit({"op": JOURNAL_DELETE_CONFIG, "name": name})
+            if index <= self.configuration_index:
+                self.configuration_index = (self.configuration_index - 1) % len(self.configurations)
+            logging.info(f"Deleted configuration {name}")
 
     def get_key_function(self, key: str) -> KeyFunction:
         """Returns the function for a key
@@ -191,41 +491,207 @@ class ConfigurationManager:
         :param function: The KeyFunction to update the key to
         """
         logging.info(f"Updating key {key}: {function.get_name()}")
-        self.configurations[self.configuration_index].keys[key] = function
-        self.__save_configurations()
+        self.__edit({
+            "op": JOURNAL_SET_KEY,
+            "name": self.configurations[self.configuration_index].name,
+            "key": key,
+            "function": function.to_dict()
+        })
 
     def reset_current_config(self) -> None:
         """Resets the currently active configuration to the default function mapping
         """
+        self.__edit({"op": JOURNAL_RESET, "name": self.configurations[self.configuration_index].name})
+
+    def undo(self) -> bool:
+        """Reverts the last edit made by this instance
+        :return: True if an edit was reverted
+        """
+        if not self.undo_stack:
+            return False
+        operation, inverse = self.undo_stack.pop()
+        self.__apply_operation(inverse)
+        self.__record(inverse)
+        self.redo_stack.append((operation, inverse))
+        self.__select_configuration(inverse)
+        logging.info(f"Reverted {operation['op']} on configuration {operation['name']}")
+        return True
+
+    def redo(self) -> bool:
+        """Applies the last reverted edit again
+        :return: True if an edit was applied again
+        """
+        if not self.redo_stack:
+            return False
+        operation, inverse = self.redo_stack.pop()
+        self.__apply_operation(operation)
+        self.__record(operation)
+        self.undo_stack.append((operation, inverse))
+        self.__select_configuration(operation)
+        logging.info(f"Reapplied {operation['op']} on configuration {operation['name']}")
+        return True
+
+    def __edit(self, operation: Dict) -> None:
+        """Applies an edit to the configurations, persists it in the journal and makes it undoable
+        :param operation: the journal operation describing the edit
+        """
+        inverse = self.__get_inverse_operation(operation)
+        self.__apply_operation(operation)
+        self.__record(operation)
+        self.undo_stack.append((operation, inverse))
+        self.redo_stack.clear()
+
+    def __record(self, operation: Dict) -> None:
+        """Appends an operation to the journal and compacts the journal into a new snapshot once it grew too large.
+        If the snapshot was changed by someone else since it was read, it is read again with the journal merged into
+        it and the operation is applied on top, a journal for the old snapshot would never be replayed
+        :param operation: the operation to persist, already applied to the configurations
+        """
+        if self.__is_snapshot_changed():
+            logging.warning(f"Configuration file {self.file_name} was changed outside of the hub, reading it again")
+            name = self.get_configuration().name
+            self.read_configuration()
+            self.__apply_operation(operation)
+            index = self.__find_configuration(name)
+            self.configuration_index = index if index is not None else \
+                min(self.configuration_index, len(self.configurations) - 1)
+        if self.journal_merged:
+            logging.info("Writing the merged journal into a new snapshot")
+            self.__save_configurations()
+            return
+        self.journal.append(operation, self.snapshot_digest)
+        if self.journal.size() > JOURNAL_COMPACTION_SIZE:
+            logging.info("Compacting configuration journal")
+            self.__save_configurations()
+
+    def __get_snapshot_stat(self) -> Optional[Tuple[int, int]]:
+        """Returns the modification time and size of the snapshot file
+        :return: tuple of modification time in ns and size, None if the file cannot be read
+        """
+        try:
+            stat = os.stat(self.file_name)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __is_snapshot_changed(self) -> bool:
+        """Returns whether the snapshot file differs from the one the configurations were read from, the content is
+        only hashed if the modification time or size changed
+        :return: True if the snapshot file was replaced or edited
+        """
+        stat = self.__get_snapshot_stat()
+        if stat is None or stat == self.snapshot_stat:
+            return False
+        try:
+            with open(self.file_name, "rb") as file:
+                digest = self.journal.get_digest(file.read())
+        except OSError:
+            return False
+        self.snapshot_stat = stat
+        return digest != self.snapshot_digest
+
+    def __find_configuration(self, name: str) -> Optional[int]:
+        """Returns the index of the configuration with the given name
+        :param name: the name of the configuration
+        :return: index of the configuration or None if there is none with this name
+        """
+        for index, config in enumerate(self.configurations):
+            if config.name == name:
+                return index
+        return None
+
+    def __select_configuration(self, operation: Dict) -> None:
+        """Makes the configuration affected by an operation the active one
+        :param operation: the operation that was applied
+        """
+        index = self.__find_configuration(operation["name"])
+        if index is None:
+            index = min(self.configuration_index, len(self.configurations) - 1)
+        self.configuration_index = index
+
+    def __get_inverse_operation(self, operation: Dict) -> Dict:
+        """Returns the operation that reverts the given operation on the current configurations
+        :param operation: the operation to invert
+        :return: the inverse operation
+        """
+        name = operation["name"]
+        if operation["op"] == JOURNAL_ADD_CONFIG:
+            return {"op": JOURNAL_DELETE_CONFIG, "name": name}
+        index = self.__find_configuration(name)
+        config = self.configurations[index]
+        if operation["op"] == JOURNAL_SET_KEY:
+            return {"op": JOURNAL_SET_KEY, "name": name, "key": operation["key"],
+                    "function": config.keys[operation["key"]].to_dict()}
+        if operation["op"] == JOURNAL_DELETE_CONFIG:
+            return {"op": JOURNAL_ADD_CONFIG, "name": name, "index": index, "keys": self.__keys_to_dict(config.keys)}
+        return {"op": JOURNAL_RESET, "name": name, "keys": self.__keys_to_dict(config.keys)}
+
+    def __apply_operation(self, operation: Dict) -> None:
+        """Applies a journal operation to the configurations list
+        :param operation: the operation to apply
+        """
+        op = operation.get("op")
+        self.profile_index = None
+        if op == JOURNAL_ADD_CONFIG:
+            if self.__find_configuration(operation["name"]) is not None:
+                # replaying a journal that was already compacted into the snapshot adds nothing twice
+                logging.debug(f"Skipping journal operation {op} for existing configuration {operation['name']}")
+                return
+            keys = self.get_configuration_list_from_dict({operation["name"]: operation["keys"]})[0].keys
+            index = operation.get("index", len(self.configurations))
+            self.configurations.insert(index, Configuration(name=operation["name"], keys=keys))
+            return
+        index = self.__find_configuration(operation.get("name"))
+        if index is None:
+            logging.warning(f"Skipping journal operation {op} for unknown configuration {operation.get('name')}")
+            return
+        if op == JOURNAL_SET_KEY:
+            self.configurations[index].keys[sys.intern(operation["key"])] = KeyFunction.from_dict(operation["function"])
+        elif op == JOURNAL_DELETE_CONFIG:
+            self.configurations.pop(index)
+        elif op == JOURNAL_RESET:
+            keys = operation.get("keys", self.device.get_default_keys())
+            self.configurations[index].keys = {sys.intern(key): KeyFunction.from_dict(keys[key]) for key in keys.keys()}
+        else:
+            logging.warning(f"Skipping unknown journal operation {op}")
+
+    @staticmethod
+    def __keys_to_dict(keys: Dict[str, KeyFunction]) -> Dict:
+        """Maps the keys of a configuration to a dictionary
+        :param keys: the mapping of keys to their function
+        :return: Dict representing the keys
+        """
         key_dict = {}
-        config = DEFAULT_CONFIG_KEYS
-        for key in config.keys():
-            name, arg, function_type = config[key].values()
-            key_dict[key] = KeyFunction(arg, FunctionType(function_type), name)
-        self.configurations[self.configuration_index].keys = key_dict
-        self.__save_configurations()
+        key: str
+        function: KeyFunction
+        for key, function in keys.items():
+            key_dict[key] = function.to_dict()
+        return key_dict
 
     def __save_configurations(self) -> None:
-        """Writes the current configurations in the configuration file
+        """Writes the current configurations in the configuration file as new snapshot and starts an empty journal
         """
         config_dict = {}
         for config in self.configurations:
-            key_dict = {}
-            key: str
-            function: KeyFunction
-            for key, function in config.keys.items():
-                key_dict[key] = function.to_dict()
-            config_dict[config.name] = key_dict
-        with open(DEFAULT_FILE_NAME, "w") as file:
-            json.dump(config_dict, file)
+            config_dict[config.name] = self.__keys_to_dict(config.keys)
+        snapshot = json.dumps(config_dict).encode("utf-8")
+        # the old snapshot stays complete until the new one replaces it, the journal only matches a complete snapshot
+        temporary_path = self.file_name + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(snapshot)
+        os.replace(temporary_path, self.file_name)
+        self.snapshot_stat = self.__get_snapshot_stat()
+        self.snapshot_digest = self.journal.get_digest(snapshot)
+        self.journal.reset(self.snapshot_digest)
+        self.journal_merged = False
 
     def __update_config(self) -> None:
         """Save default configuration if configuration file does not exist already and
         loads configuration from file
         """
-        if not os.path.isfile(DEFAULT_FILE_NAME):
-            lines = {'default': DEFAULT_CONFIG_KEYS}
-            with open(DEFAULT_FILE_NAME, "w") as file:
+        if not os.path.isfile(self.file_name):
+            lines = {'default': self.device.get_default_keys()}
+            with open(self.file_name, "w") as file:
                 json.dump(lines, file)
             logging.info("Wrote default config file")
         self.configurations.clear()
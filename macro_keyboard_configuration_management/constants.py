@@ -12,6 +12,9 @@ INTERNAL_FUNCTION = "FKT"
 NEXT = "NEXT"
 LOCK = "LOCK"
 PREV = "PREV"
+JUMP = "JUMP"
+JUMP_SEPARATOR = ":"
+PROFILE = "PROFILE"
 DELETE = "DELETE"
 ADD = "ADD"
 RESET = "RESET"
@@ -20,6 +23,39 @@ CANCEL = "CANCEL"
 EDIT = "EDIT"
 
 DEFAULT_FILE_NAME = "configuration/configuration.mkc"
+JOURNAL_FILE_TYPE = ".mkj"
+JOURNAL_FILE_NAME = "configuration/configuration.mkj"
+JOURNAL_COMPACTION_SIZE = 64 * 1024
+JOURNAL_HEADER = "header"
+JOURNAL_SET_KEY = "set_key"
+JOURNAL_ADD_CONFIG = "add_config"
+JOURNAL_DELETE_CONFIG = "delete_config"
+JOURNAL_RESET = "reset"
+TEMPLATE_DATE = "date"
+TEMPLATE_TIME = "time"
+TEMPLATE_DATETIME = "datetime"
+TEMPLATE_CLIPBOARD = "clipboard"
+TEMPLATE_COUNTER = "counter"
+TEMPLATE_ENV = "env"
+TEMPLATE_SEPARATOR = ":"
+DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+DEFAULT_TIME_FORMAT = "%H:%M"
+DEFAULT_DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+VAULT = "VAULT"
+VAULT_SEPARATOR = ":"
+VAULT_FILE_NAME = "configuration/vault.mkv"
+VAULT_PASSPHRASE = "VAULT_PASSPHRASE"
+VAULT_KEY_ITERATIONS = 200_000
+VAULT_CACHE_SIZE = 32
+VAULT_CACHE_TTL = 300
+CACHE_FILE_TYPE = ".mkcache"
+CACHE_FILE_NAME = "configuration/configuration.mkcache"
+CACHE_FORMAT_VERSION = 2
+STATE_FILE_TYPE = ".mks"
+STATE_FILE_NAME = "configuration/state.mks"
+STATE_NAME_LENGTH = 256
+STATE_READ_RETRIES = 100
+STATE_POLL_INTERVAL = 100
 DEFAULT_CONFIG_KEYS = {
     'f13': {"name": None, 'arg': 'f13', 'function_type': 'MACRO'},
     'f14': {"name": None, 'arg': 'f14', 'function_type': 'MACRO'},
@@ -39,4 +75,37 @@ DEFAULT_CONFIG_KEYS = {
     'ctrl+f20': {"name": None, 'arg': 'FKT_NEXT', 'function_type': 'INTERNAL'},
 }
 
+DEVICES_FILE_NAME = "configuration/devices.json"
+DEVICE_FILE_PREFIX = "configuration/"
+DEFAULT_DEVICE_NAME = "default"
+# the names of the other files in the configuration directory, a device of that name would share them
+RESERVED_DEVICE_NAMES = ("configuration", "state", "vault", "devices")
+DEVICE_NAME_FORBIDDEN_CHARACTERS = "/\\:"
+DEFAULT_LAYOUT = [
+    ['f13', 'f14', 'f15', 'f16'],
+    ['f17', 'f18', 'f19', 'f20'],
+    ['ctrl+f13', 'ctrl+f14', 'ctrl+f15', 'ctrl+f16'],
+    ['ctrl+f17', 'ctrl+f18', 'ctrl+f19', 'ctrl+f20'],
+]
+
 POPUP_PADDING = 20
+
+SEQUENCE_SEPARATOR = ","
+SEQUENCE_TIMEOUT = 0.5
+REPEAT_DELAY = 0.5
+REPEAT_RATE = 10.0
+REPEAT_RELEASE_CHECK_INTERVAL = 0.25
+TIMER_WHEEL_TICK = 0.005
+TIMER_WHEEL_SLOTS = 512
+
+ACTION_QUEUE_SIZE = 64
+FOCUS_ACTION = "focus"
+RELOAD_ACTION = "reload"
+PROFILER_INTERVAL = 0.005
+
+SELFTEST_RATE = 20
+SELFTEST_DURATION = 3.0
+LOADTEST_RATE = 500
+LOADTEST_DURATION = 10.0
+LATENCY_BUDGET_P99 = 50.0
+CPU_BUDGET = 0.5
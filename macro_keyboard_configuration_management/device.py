@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+from json import JSONDecodeError
+from typing import Dict, List, Optional
+
+from macro_keyboard_configuration_management.constants import DEFAULT_DEVICE_NAME, DEFAULT_LAYOUT, DEVICES_FILE_NAME, \
+    DEFAULT_CONFIG_KEYS, DEFAULT_FILE_NAME, JOURNAL_FILE_NAME, CACHE_FILE_NAME, DEVICE_FILE_PREFIX, \
+    MACRO_KEYBOARD_FILE_TYPE, JOURNAL_FILE_TYPE, CACHE_FILE_TYPE, STATE_FILE_NAME, STATE_FILE_TYPE, \
+    SEQUENCE_SEPARATOR, RESERVED_DEVICE_NAMES, DEVICE_NAME_FORBIDDEN_CHARACTERS
+
+
+class Device:
+    __slots__ = ("name", "layout")
+
+    def __init__(self, name: str, layout: List[List[str]]) -> None:
+        """Represents a MacroKeyboard with its own layout and its own set of configurations
+        :param name: the name of the device
+        :param layout: rows of the hotkeys the device sends, as they are arranged on the device
+        """
+        self.name = name
+        self.layout = layout
+
+    def get_keys(self) -> List[str]:
+        """Returns all hotkeys of the device
+        :return: list of hotkeys row by row
+        """
+        return [key for row in self.layout for key in row]
+
+    def get_default_keys(self) -> Dict:
+        """Returns the default function mapping of the device, every key of the layout sends itself, except for the
+        keys of the default device that have a function in the default configuration
+        :return: Dict mapping every key of the layout to its default function
+        """
+        default_keys = DEFAULT_CONFIG_KEYS if self.name == DEFAULT_DEVICE_NAME else {}
+        return {key: default_keys.get(key, {"name": None, "arg": key, "function_type": "MACRO"})
+                for key in self.get_keys()}
+
+    def owns(self, sequence: str) -> bool:
+        """Returns whether every hotkey of a sequence belongs to the layout of the device, keys that are only left in
+        the configuration file must not take the keys of another device
+        :param sequence: a single hotkey or hotkeys separated by commas
+        :return: True if the device sends all hotkeys of the sequence
+        """
+        keys = self.get_keys()
+        return all(step.strip() in keys for step in sequence.split(SEQUENCE_SEPARATOR))
+
+    def get_file_names(self):
+        """Returns the configuration, journal and cache file names of the device
+        :return: tuple of file names, the default device keeps the original file names
+        """
+        if self.name == DEFAULT_DEVICE_NAME:
+            return DEFAULT_FILE_NAME, JOURNAL_FILE_NAME, CACHE_FILE_NAME
+        prefix = f"{DEVICE_FILE_PREFIX}{self.name}"
+        return f"{prefix}{MACRO_KEYBOARD_FILE_TYPE}", f"{prefix}{JOURNAL_FILE_TYPE}", f"{prefix}{CACHE_FILE_TYPE}"
+
+    def get_state_file_name(self) -> str:
+        """Returns the name of the file holding the active state shared between listener and GUI
+        :return: str, the file name, the default device keeps the original file name
+        """
+        if self.name == DEFAULT_DEVICE_NAME:
+            return STATE_FILE_NAME
+        return f"{DEVICE_FILE_PREFIX}{self.name}{STATE_FILE_TYPE}"
+
+
+def read_devices() -> List[Device]:
+    """Reads the declared devices, writes the declaration for the single default device if there is none. The file is
+    edited by hand, so an invalid declaration is logged and replaced by the default device instead of stopping the
+    listener or the GUI
+    :return: list of Devices
+    """
+    if not os.path.isfile(DEVICES_FILE_NAME):
+        with open(DEVICES_FILE_NAME, "w") as file:
+            json.dump({DEFAULT_DEVICE_NAME: DEFAULT_LAYOUT}, file)
+        logging.info("Wrote default devices file")
+    try:
+        with open(DEVICES_FILE_NAME, "r") as file:
+            devices: Dict = json.load(file)
+    except JSONDecodeError as jde:
+        logging.warning(jde)
+        devices = {DEFAULT_DEVICE_NAME: DEFAULT_LAYOUT}
+    error = validate_devices(devices)
+    if error is not None:
+        logging.warning(f"Ignoring invalid devices file {DEVICES_FILE_NAME}: {error}, using the default device")
+        devices = {DEFAULT_DEVICE_NAME: DEFAULT_LAYOUT}
+    return [Device(name, layout) for name, layout in devices.items()]
+
+
+def validate_devices(devices) -> Optional[str]:
+    """Checks the content of the devices file, the device names become part of file names, so they must neither
+    contain a path nor match the name of another file in the configuration directory
+    :param devices: the parsed devices file
+    :return: str describing the first problem or None if the declaration is valid
+    """
+    if not isinstance(devices, dict) or not devices:
+        return "has to map at least one device name to its layout"
+    used_names = set()
+    for name, layout in devices.items():
+        if not name.strip() or any(character in name for character in DEVICE_NAME_FORBIDDEN_CHARACTERS) or \
+                name in (os.curdir, os.pardir):
+            return f"device name '{name}' is empty or contains a path"
+        # file names are case insensitive on Windows
+        if name.lower() in RESERVED_DEVICE_NAMES:
+            return f"device name '{name}' is reserved for {', '.join(RESERVED_DEVICE_NAMES)} files"
+        if name.lower() in used_names:
+            return f"device name '{name}' is used twice"
+        used_names.add(name.lower())
+        if not isinstance(layout, list) or not layout or \
+                not all(isinstance(row, list) and all(isinstance(key, str) and key for key in row) for row in layout):
+            return f"layout of device '{name}' has to be a list of rows of hotkeys"
+    return None
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+from json import JSONDecodeError
+from typing import Dict, List, Optional
+
+from macro_keyboard_configuration_management.constants import JOURNAL_FILE_NAME, JOURNAL_HEADER
+
+
+class ConfigurationJournal:
+
+    def __init__(self, path: str = JOURNAL_FILE_NAME) -> None:
+        """Append-only journal of configuration edits that is replayed on top of the configuration snapshot.
+        The first record of the journal names the digest of the snapshot it belongs to, so the configuration manager
+        notices when the snapshot was replaced, e.g. edited by hand, and merges the journal into it
+        :param path: the path of the journal file
+        """
+        self.path = path
+        self.digest: Optional[str] = None
+
+    @staticmethod
+    def get_digest(snapshot: bytes) -> str:
+        """Returns the digest identifying a snapshot
+        :param snapshot: the raw content of the snapshot file
+        :return: str, hex digest of the snapshot
+        """
+        return hashlib.sha1(snapshot).hexdigest()
+
+    def size(self) -> int:
+        """Returns the size of the journal file
+        :return: int, size in bytes, 0 if there is no journal
+        """
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def load(self) -> bytes:
+        """Returns the raw content of the journal
+        :return: bytes of the journal file, empty if there is no journal
+        """
+        try:
+            with open(self.path, "rb") as file:
+                return file.read()
+        except OSError:
+            return b""
+
+    def read(self, digest: Optional[str], content: bytes = None) -> List[Dict]:
+        """Reads all complete operations of the journal belonging to the given snapshot
+        :param digest: the digest of the snapshot the operations are replayed on, None to read them for any snapshot
+        :param content: the raw content of the journal if it was already loaded
+        :return: list of operations in the order they were written
+        """
+        operations, _ = self.__parse(self.load() if content is None else content, digest)
+        return operations
+
+    def get_snapshot(self, content: bytes = None) -> Optional[str]:
+        """Returns the digest of the snapshot named in the header of the journal
+        :param content: the raw content of the journal if it was already loaded
+        :return: str, the digest or None if there is no journal or its header is damaged
+        """
+        content = self.load() if content is None else content
+        try:
+            header = json.loads(content[:content.find(b"\n")])
+        except (JSONDecodeError, UnicodeDecodeError):
+            return None
+        if not isinstance(header, dict) or header.get("op") != JOURNAL_HEADER:
+            return None
+        return header.get("snapshot")
+
+    def append(self, operation: Dict, digest: str) -> None:
+        """Appends a single operation to the journal
+        :param operation: the operation to append
+        :param digest: the digest of the snapshot the journal belongs to, the journal is checked again whenever it
+        differs from the digest of the last append
+        """
+        if self.digest != digest:
+            self.recover(digest)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(operation) + "\n")
+
+    def recover(self, digest: str) -> None:
+        """Truncates a torn last record, or starts a new journal if the current one belongs to another snapshot
+        :param digest: the digest of the snapshot the journal belongs to
+        """
+        self.digest = digest
+        _, valid_length = self.__parse(self.load(), digest)
+        if valid_length is None:
+            self.reset(digest)
+        elif valid_length < self.size():
+            logging.warning(f"Truncating torn journal record at offset {valid_length}")
+            with open(self.path, "r+b") as file:
+                file.truncate(valid_length)
+
+    def reset(self, digest: str) -> None:
+        """Starts an empty journal for the given snapshot, used after compaction
+        :param digest: the digest of the snapshot the journal belongs to
+        """
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"op": JOURNAL_HEADER, "snapshot": digest}) + "\n")
+        self.digest = digest
+
+    @staticmethod
+    def __parse(content: bytes, digest: str):
+        """Parses the journal and returns its operations and the length of its valid prefix
+        :param content: the raw content of the journal
+        :param digest: the digest of the snapshot the operations are replayed on, None to accept any snapshot
+        :return: tuple of operations and valid length, the length is None if the journal does not belong to the snapshot
+        """
+        operations = []
+        offset = 0
+        header_read = False
+        while offset < len(content):
+            end = content.find(b"\n", offset)
+            if end == -1:
+                break
+            try:
+                record = json.loads(content[offset:end])
+            except (JSONDecodeError, UnicodeDecodeError):
+                break
+            if not header_read:
+                if record.get("op") != JOURNAL_HEADER or (digest is not None and record.get("snapshot") != digest):
+                    logging.debug("Journal belongs to another snapshot and is ignored")
+                    return [], None
+                header_read = True
+            else:
+                operations.append(record)
+            offset = end + 1
+        if not header_read:
+            return [], None
+        return operations, offset
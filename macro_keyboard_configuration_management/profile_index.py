@@ -0,0 +1,68 @@
+from typing import List, Optional, Tuple
+
+PROFILE_NAME_WEIGHT = 2.0
+KEY_FUNCTION_NAME_WEIGHT = 1.0
+
+
+class ProfileIndex:
+
+    def __init__(self, configurations: List) -> None:
+        """Searchable index over the names of the configurations and the names of their key functions, supporting
+        incremental fuzzy matching: a query matches if its characters appear in order in an indexed name
+        :param configurations: the configurations to index, in the order of the configuration manager
+        """
+        self.entries: List[Tuple[str, int, float]] = []
+        for position, configuration in enumerate(configurations):
+            self.entries.append((configuration.name.lower(), position, PROFILE_NAME_WEIGHT))
+            for function in configuration.keys.values():
+                name = function.get_name()
+                if name:
+                    self.entries.append((name.lower(), position, KEY_FUNCTION_NAME_WEIGHT))
+        self.last_query = ""
+        self.last_candidates = list(range(len(self.entries)))
+
+    def search(self, query: str, limit: int = 10) -> List[int]:
+        """Returns the positions of the best matching configurations. If the query extends the previous query, only
+        the entries that matched the previous query are searched again
+        :param query: the text typed so far
+        :param limit: the maximum number of results
+        :return: list of configuration positions, best match first
+        """
+        query = query.lower()
+        candidates = self.last_candidates if query.startswith(self.last_query) else range(len(self.entries))
+        matches = []
+        best_scores = {}
+        for entry_id in candidates:
+            text, position, weight = self.entries[entry_id]
+            score = self.score(query, text)
+            if score is None:
+                continue
+            matches.append(entry_id)
+            score = score * weight
+            if score > best_scores.get(position, 0):
+                best_scores[position] = score
+        self.last_query = query
+        self.last_candidates = matches
+        return sorted(best_scores, key=lambda position: (-best_scores[position], position))[:limit]
+
+    @staticmethod
+    def score(query: str, text: str) -> Optional[float]:
+        """Scores how well a query matches a text, consecutive characters and matches at word starts score higher
+        :param query: the lower case query
+        :param text: the lower case indexed text
+        :return: the score or None if the characters of the query do not appear in order in the text
+        """
+        score = 1.0
+        index = -1
+        for character in query:
+            found = text.find(character, index + 1)
+            if found == -1:
+                return None
+            if found == index + 1:
+                score += 2.0
+            elif found == 0 or not text[found - 1].isalnum():
+                score += 1.5
+            else:
+                score += 1.0 / (found - index)
+            index = found
+        return score / (1 + 0.01 * len(text))
@@ -0,0 +1,119 @@
+import itertools
+import logging
+import os
+import re
+import time
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+from macro_keyboard_configuration_management.constants import TEMPLATE_DATE, TEMPLATE_TIME, TEMPLATE_DATETIME, \
+    TEMPLATE_CLIPBOARD, TEMPLATE_COUNTER, TEMPLATE_ENV, DEFAULT_DATE_FORMAT, DEFAULT_TIME_FORMAT, \
+    DEFAULT_DATETIME_FORMAT
+
+_FIELD_NAMES = "|".join([TEMPLATE_DATETIME, TEMPLATE_DATE, TEMPLATE_TIME, TEMPLATE_CLIPBOARD, TEMPLATE_COUNTER,
+                         TEMPLATE_ENV])
+# {{field}} writes {field} literally, {field} and {field:argument} are evaluated, everything else is plain text
+FIELD_PATTERN = re.compile(rf"\{{(\{{(?:{_FIELD_NAMES})(?::[^{{}}]*)?\}})\}}|\{{({_FIELD_NAMES})(?::([^{{}}]*))?\}}")
+
+
+class Template:
+    """Compiled abbreviation text, the literal parts are merged into a single format string at compile time so an
+    expansion only evaluates the fields and formats once
+    """
+    __slots__ = ("format", "fields")
+
+    def __init__(self, format_string: str, fields: Tuple[Callable[[], str], ...]) -> None:
+        self.format = format_string
+        self.fields = fields
+
+    def is_static(self) -> bool:
+        """Returns whether the template contains no fields
+        :return: True if every expansion gives the same text
+        """
+        return not self.fields
+
+    def render(self) -> str:
+        """Evaluates the fields and returns the expanded text
+        :return: str, the text to write
+        """
+        if not self.fields:
+            return self.format
+        return self.format % tuple([field() for field in self.fields])
+
+    @staticmethod
+    def compile(text: str) -> 'Template':
+        """Returns the compiled template for a text, every distinct text is only parsed once
+        :param text: the abbreviation text
+        :return: Template shared by all abbreviations with the same text
+        """
+        template = _compiled_templates.get(text)
+        if template is None:
+            template = Template.__parse(text)
+            _compiled_templates[text] = template
+        return template
+
+    @staticmethod
+    def __parse(text: str) -> 'Template':
+        """Splits a text into literal parts and field evaluators
+        :param text: the abbreviation text
+        :return: the new Template
+        """
+        literals: List[str] = []
+        fields: List[Callable[[], str]] = []
+        position = 0
+        for match in FIELD_PATTERN.finditer(text):
+            escaped, name, argument = match.groups()
+            literals.append(text[position:match.start()])
+            if escaped is not None:
+                literals.append(escaped)
+            else:
+                literals.append(None)
+                fields.append(get_field(name, argument))
+            position = match.end()
+        literals.append(text[position:])
+        if not fields:
+            return Template("".join(literals), ())
+        format_string = "".join("%s" if literal is None else literal.replace("%", "%%") for literal in literals)
+        return Template(format_string, tuple(fields))
+
+
+_compiled_templates: Dict[str, Template] = {}
+_counters: Dict[str, itertools.count] = {}
+
+
+def get_field(name: str, argument: str = None) -> Callable[[], str]:
+    """Returns the evaluator of a template field
+    :param name: the name of the field
+    :param argument: the text after the separator, a strftime format, a counter name or a variable name
+    :return: Callable returning the current value of the field
+    """
+    if name == TEMPLATE_DATE:
+        return partial(time.strftime, argument or DEFAULT_DATE_FORMAT)
+    elif name == TEMPLATE_TIME:
+        return partial(time.strftime, argument or DEFAULT_TIME_FORMAT)
+    elif name == TEMPLATE_DATETIME:
+        return partial(time.strftime, argument or DEFAULT_DATETIME_FORMAT)
+    elif name == TEMPLATE_CLIPBOARD:
+        return read_clipboard
+    elif name == TEMPLATE_COUNTER:
+        counter = _counters.setdefault(argument or "", itertools.count(1))
+        return lambda: str(next(counter))
+    elif name == TEMPLATE_ENV:
+        return partial(os.getenv, argument or "", "")
+    raise ValueError(f"Unknown template field {name}")
+
+
+def read_clipboard() -> str:
+    """Returns the text in the clipboard
+    :return: str, the text or an empty string if the clipboard holds no text or cannot be read
+    """
+    try:
+        import win32clipboard
+        win32clipboard.OpenClipboard()
+        try:
+            return win32clipboard.GetClipboardData(win32clipboard.CF_UNICODETEXT)
+        finally:
+            win32clipboard.CloseClipboard()
+    except Exception as e:
+        logging.warning(f"Could not read the clipboard: {e}")
+        return ""
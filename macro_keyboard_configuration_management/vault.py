@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from json import JSONDecodeError
+from typing import Dict, Optional, Tuple
+
+from macro_keyboard_configuration_management.constants import VAULT, VAULT_SEPARATOR, VAULT_FILE_NAME, \
+    VAULT_PASSPHRASE, VAULT_KEY_ITERATIONS, VAULT_CACHE_SIZE, VAULT_CACHE_TTL
+
+
+class AbbreviationVault:
+
+    def __init__(self, path: str = VAULT_FILE_NAME, passphrase: str = None, cache_size: int = VAULT_CACHE_SIZE,
+                 cache_ttl: float = VAULT_CACHE_TTL) -> None:
+        """Encrypted store for abbreviation texts, the configuration only holds a reference to the entry. Entries are
+        encrypted with the Windows data protection API of the current user, the key derived from the optional
+        passphrase is used as additional entropy. Nothing is read or decrypted before an entry is expanded, and
+        decrypted texts are only kept in a small cache for a limited time
+        :param path: the path of the vault file
+        :param passphrase: the passphrase, read from the environment if not given
+        :param cache_size: the maximum number of decrypted texts that are kept
+        :param cache_ttl: seconds a decrypted text is kept after it was decrypted
+        """
+        self.path = path
+        self.passphrase = passphrase if passphrase is not None else os.getenv(VAULT_PASSPHRASE, "")
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.salt: Optional[bytes] = None
+        self.entries: Dict[str, str] = {}
+        self.modified = None
+        self.key: Optional[bytes] = None
+        self.plaintexts: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.timer: Optional[threading.Timer] = None
+
+    @staticmethod
+    def is_reference(arg: str) -> bool:
+        """Returns whether the argument of an abbreviation refers to a vault entry
+        :param arg: the argument of the KeyFunction
+        :return: True if the text is stored in the vault
+        """
+        return arg.startswith(VAULT + VAULT_SEPARATOR)
+
+    def store(self, text: str) -> str:
+        """Encrypts a text into a new entry of the vault, used by the GUI
+        :param text: the abbreviation text
+        :return: str, the reference to use as argument of the KeyFunction
+        """
+        with self.lock:
+            self.__load()
+            if self.salt is None:
+                self.salt = secrets.token_bytes(16)
+            entry_id = secrets.token_hex(8)
+            self.entries[entry_id] = base64.b64encode(self.__protect(text.encode("utf-8"))).decode("ascii")
+            self.__save()
+        logging.info(f"Stored abbreviation in vault entry {entry_id}")
+        return f"{VAULT}{VAULT_SEPARATOR}{entry_id}"
+
+    def get(self, reference: str) -> str:
+        """Returns the decrypted text of an entry, decrypting it only if it is not cached
+        :param reference: the reference to the entry
+        :return: str, the text or an empty string if the entry cannot be decrypted
+        """
+        entry_id = reference[len(VAULT) + len(VAULT_SEPARATOR):]
+        with self.lock:
+            cached = self.plaintexts.get(entry_id)
+            if cached is not None and cached[0] > time.monotonic():
+                self.plaintexts.move_to_end(entry_id)
+                return cached[1]
+            self.__load()
+            ciphertext = self.entries.get(entry_id)
+            if ciphertext is None:
+                logging.warning(f"Vault entry {entry_id} does not exist")
+                return ""
+            try:
+                text = self.__unprotect(base64.b64decode(ciphertext)).decode("utf-8")
+            except Exception as e:
+                logging.error(f"Could not decrypt vault entry {entry_id}, it was encrypted by another Windows user or "
+                              f"with another {VAULT_PASSPHRASE} than the one in the .env file: {e}")
+                return ""
+            self.plaintexts[entry_id] = (time.monotonic() + self.cache_ttl, text)
+            self.plaintexts.move_to_end(entry_id)
+            while len(self.plaintexts) > self.cache_size:
+                self.plaintexts.popitem(last=False)
+            if self.timer is None:
+                self.__schedule_expiry(self.cache_ttl)
+        return text
+
+    def wipe(self) -> None:
+        """Drops all decrypted texts and the derived key, called when the configuration is locked
+        """
+        with self.lock:
+            self.plaintexts.clear()
+            self.key = None
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        logging.info("Vault cache wiped")
+
+    def expire(self) -> None:
+        """Drops the decrypted texts whose time is up, called by the expiry timer
+        """
+        with self.lock:
+            self.timer = None
+            now = time.monotonic()
+            for entry_id in [entry_id for entry_id, (expiry, _) in self.plaintexts.items() if expiry <= now]:
+                del self.plaintexts[entry_id]
+            if self.plaintexts:
+                self.__schedule_expiry(min(expiry for expiry, _ in self.plaintexts.values()) - now)
+
+    def __schedule_expiry(self, delay: float) -> None:
+        """Starts the timer that drops expired texts, the lock has to be held
+        :param delay: seconds until the next text expires
+        """
+        self.timer = threading.Timer(max(delay, 0), self.expire)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def __load(self) -> None:
+        """Reads the encrypted entries if the vault file changed since it was read, the lock has to be held
+        """
+        try:
+            modified = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if modified == self.modified:
+            return
+        try:
+            with open(self.path, "r") as file:
+                vault = json.load(file)
+            salt = bytes.fromhex(vault["salt"])
+            if salt != self.salt:
+                self.key = None
+            self.salt = salt
+            self.entries = vault["entries"]
+            self.modified = modified
+        except (OSError, JSONDecodeError, KeyError, ValueError) as e:
+            logging.warning(f"Could not read vault {self.path}: {e}")
+
+    def __save(self) -> None:
+        """Writes the encrypted entries, the lock has to be held
+        """
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"salt": self.salt.hex(), "entries": self.entries}, file)
+        os.replace(temporary_path, self.path)
+        self.modified = os.stat(self.path).st_mtime_ns
+
+    def __get_key(self) -> bytes:
+        """Returns the key derived from the passphrase, it is only derived again after the vault was wiped
+        :return: bytes, the derived key
+        """
+        if self.key is None:
+            self.key = hashlib.pbkdf2_hmac("sha256", self.passphrase.encode("utf-8"), self.salt,
+                                           VAULT_KEY_ITERATIONS)
+        return self.key
+
+    def __protect(self, data: bytes) -> bytes:
+        import win32crypt
+        return win32crypt.CryptProtectData(data, None, self.__get_key(), None, None, 0)
+
+    def __unprotect(self, data: bytes) -> bytes:
+        import win32crypt
+        return win32crypt.CryptUnprotectData(data, self.__get_key(), None, None, 0)[1]
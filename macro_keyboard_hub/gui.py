@@ -1,12 +1,30 @@
+from functools import lru_cache
+
 import customtkinter as ctk
 from PIL import Image
 import keyboard
 from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager, KeyFunction, FunctionType
-from macro_keyboard_configuration_management.constants import ABBREVIATION, BUTTON, INTERNAL_FUNCTION, CONFIG, RESET, ADD, DELETE, PREV, NEXT, CANCEL, EDIT, LOCK
+from macro_keyboard_configuration_management.constants import ABBREVIATION, BUTTON, INTERNAL_FUNCTION, CONFIG, RESET, ADD, DELETE, PREV, NEXT, CANCEL, EDIT, LOCK, JUMP, JUMP_SEPARATOR, STATE_POLL_INTERVAL
+from macro_keyboard_configuration_management.device import read_devices
+from macro_keyboard_configuration_management.vault import AbbreviationVault
 from macro_keyboard_hub.popup.abbreviation_dialog import AbbreviationDialog
 from macro_keyboard_hub.popup.confirmation_dialog import ConfirmationDialog
 from macro_keyboard_hub.popup.popup import Popup
 from macro_keyboard_hub.titlebar import TitleBar
+from macro_keyboard_hub.virtual_grid import VirtualGrid
+
+
+@lru_cache(maxsize=None)
+def load_icon(image_path: str, size: int = 24) -> ctk.CTkImage:
+    """Loads and scales an icon once, later calls return the cached image
+    :param image_path: path of the icon file
+    :param size: width and height of the icon in pixels
+    :return: ctk.CTkImage of the icon
+    """
+    image = Image.open(image_path)
+    image = image.resize((size, size))
+    return ctk.CTkImage(image, size=(size, size))
+
 
 class GUI:
     def __init__(self) -> None:
@@ -14,7 +32,9 @@ class GUI:
         Initializes the GUI and creates the layout from the configuration manager
         """
         self.recording = False
-        self.configuration_manager = ConfigurationManager()
+        self.configuration_managers = {device.name: ConfigurationManager(device) for device in read_devices()}
+        self.configuration_manager = next(iter(self.configuration_managers.values()))
+        self.vault = AbbreviationVault()
 
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("dark-blue")
@@ -24,11 +44,28 @@ class GUI:
         titlebar = TitleBar(self.root, title="Custom MacroKeyboard Hub")
         titlebar.pack(fill="both")
         self.root.resizable(True, True)
+        self.root.bind("<Control-z>", lambda _: self.handle_undo())
+        self.root.bind("<Control-y>", lambda _: self.handle_redo())
+
+        self.edit_popup = None
+        self.edit_key = None
+        self.abbreviation_dialog = None
+        self.confirmation_dialog = None
+        self.input_dialog_shown = False
+        self.listener_sequences = {name: 0 for name in self.configuration_managers.keys()}
 
         self.create_widgets()
         self.update_buttons()
+        self.root.after_idle(self.create_dialogs)
+        self.root.after(STATE_POLL_INTERVAL, self.follow_listener)
 
     def create_widgets(self):
+        if len(self.configuration_managers) > 1:
+            self.device_button = ctk.CTkSegmentedButton(self.root, values=list(self.configuration_managers.keys()),
+                                                        command=self.handle_device_change)
+            self.device_button.set(self.configuration_manager.device.name)
+            self.device_button.pack(pady=(10, 0), padx=10, fill=ctk.X)
+
         self.config_frame = ctk.CTkFrame(self.root)
         self.config_frame.pack(pady=10, padx=10, fill=ctk.X)
 
@@ -50,31 +87,41 @@ class GUI:
         self.add_button = self.create_icon_button("icons/arrow_right.png", self.handle_next_config)
         self.add_button.pack(side=ctk.RIGHT, padx=5)
 
-        self.keyboard_frame = ctk.CTkFrame(self.root, corner_radius=10)
+        self.jump_frame = ctk.CTkFrame(self.root, fg_color="transparent")
+        self.jump_frame.pack(padx=10, fill=ctk.X)
+
+        self.jump_entry = ctk.CTkEntry(self.jump_frame, placeholder_text="Jump to configuration...", width=200)
+        self.jump_entry.pack(side=ctk.LEFT, padx=5)
+        self.jump_entry.bind("<KeyRelease>", self.handle_jump_search)
+        self.jump_entry.bind("<Return>", self.handle_jump)
+
+        self.jump_label = ctk.CTkLabel(self.jump_frame, text="", anchor="w")
+        self.jump_label.pack(side=ctk.LEFT, expand=True, fill=ctk.X, padx=5)
+
+        self.keyboard_frame = VirtualGrid(self.root, command=self.handle_button_event, corner_radius=10)
         self.keyboard_frame.pack(padx = 10, pady = 10, fill=ctk.BOTH, expand=True)
 
-        self.button_frames = [ctk.CTkFrame(self.keyboard_frame, fg_color="transparent") for _ in range(4)]
-        for frame in self.button_frames:
-            frame.pack(fill=ctk.BOTH, expand=True)
+    def create_dialogs(self):
+        """Builds the dialogs once after startup, they are reconfigured and shown instead of being rebuilt on every use
+        """
+        if self.edit_popup is not None:
+            return
+        self.edit_popup = self.create_edit_popup()
+        self.abbreviation_dialog = AbbreviationDialog(self.root, 300, 300)
+        self.confirmation_dialog = ConfirmationDialog(self.root, 250, 150, title="", text="", font=("Helvetica", 15))
 
     def create_icon_button(self, image_path, command):
-        image = Image.open(image_path)
-        image = image.resize((24, 24))
-        photo = ctk.CTkImage(image, size=(24,24))
+        photo = load_icon(image_path)
         button = ctk.CTkButton(self.config_frame, image=photo, command=command, text="", width=24, height=24, corner_radius=10)
         return button
 
     def update_buttons(self):
-        for frame in self.button_frames:
-            for widget in frame.winfo_children():
-                widget.destroy()
-
-        function: KeyFunction
-        for index, (key, function) in enumerate(self.configuration_manager.get_configuration().keys.items()):
-            button = ctk.CTkButton(self.button_frames[index // 4], text=function.get_name(), command=lambda k=key: self.handle_button_event(k), 
-                                   corner_radius=10, fg_color="#2E2E2E", hover_color="#3E3E3E", height=50)
-            # button.grid(column=index%4, row=index//4, padx=5, pady=5)
-            button.pack(side=ctk.LEFT, padx=5, pady=5, fill=ctk.BOTH, expand=True)
+        # the grid follows the layout of the device, sequences like "f13, f15" have no button of their own
+        keys = self.configuration_manager.get_configuration().keys
+        self.keyboard_frame.set_rows([
+            [(key, keys[key].get_name()) for key in row if key in keys]
+            for row in self.configuration_manager.device.layout
+        ])
 
     def start(self) -> None:
         """Starts the GUI event loop
@@ -85,11 +132,17 @@ class GUI:
         """Handles the button presses for the keys of the MacroKeyboard
         :param key: the key for which the button was pressed
         """
-        popup_window = self.create_edit_popup(key)
-        self.root.wait_visibility(popup_window)
-        self.root.wait_window(popup_window)
+        self.create_dialogs()
+        self.edit_key = key
+        self.current_function_label.configure(text=self.configuration_manager.get_key_function(key).get_name())
+        self.edit_popup.show()
+        self.edit_popup.wait_hidden()
         self.update_buttons()
 
+    def handle_device_change(self, device_name: str):
+        self.configuration_manager = self.configuration_managers[device_name]
+        self.update_configuration_name_and_buttons()
+
     def handle_prev_config(self):
         self.configuration_manager.previous_configuration()
         self.update_configuration_name_and_buttons()
@@ -99,22 +152,84 @@ class GUI:
         self.update_configuration_name_and_buttons()
 
     def handle_add_config(self):
-        config_name = ctk.CTkInputDialog(text="Input the name of the new configuration.", title="Input").get_input()
+        config_name = self.get_input("Input the name of the new configuration.")
+        while config_name and not self.configuration_manager.add_new_configuration(config_name):
+            config_name = self.get_input(f"Configuration {config_name} already exists.\nInput another name.")
         if config_name:
-            self.configuration_manager.add_new_configuration(config_name)
             self.update_configuration_name_and_buttons()
 
     def handle_delete_config(self):
-        if ConfirmationDialog(self.root, 250, 150, title="", text=f"Are you sure you want to\ndelete configuration {self.configuration_manager.get_configuration().name}?", font=("Helvetica", 15)).get_confirmation():
-            self.configuration_manager.delete_current_configuration()
+        self.create_dialogs()
+        # the listener may switch the configuration while the dialog is open, delete the one the user confirmed
+        name = self.configuration_manager.get_configuration().name
+        if self.confirmation_dialog.get_confirmation(f"Are you sure you want to\ndelete configuration {name}?"):
+            self.configuration_manager.delete_configuration(name)
             self.update_configuration_name_and_buttons()
 
     def handle_reset_config(self):
         self.configuration_manager.reset_current_config()
         self.update_configuration_name_and_buttons()
 
+    def handle_jump_search(self, event=None):
+        query = self.jump_entry.get().strip()
+        if not query:
+            self.jump_label.configure(text="")
+            return
+        configurations = self.configuration_manager.search_configurations(query, limit=5)
+        self.jump_label.configure(text="  ".join(configuration.name for configuration in configurations))
+
+    def handle_jump(self, event=None):
+        if not self.jump_entry.get().strip():
+            return
+        if self.configuration_manager.jump_to_configuration(self.jump_entry.get()):
+            self.update_configuration_name_and_buttons()
+        self.jump_entry.delete(0, ctk.END)
+        self.jump_label.configure(text="")
+        self.root.focus()
+
+    def handle_undo(self):
+        if self.configuration_manager.undo():
+            self.update_configuration_name_and_buttons()
+
+    def handle_redo(self):
+        if self.configuration_manager.redo():
+            self.update_configuration_name_and_buttons()
+
+    def is_dialog_shown(self) -> bool:
+        """Returns whether a popup or input dialog is open, the configuration must not change while the user answers
+        :return: True if any dialog is shown
+        """
+        popups = (self.edit_popup, self.abbreviation_dialog, self.confirmation_dialog)
+        return self.input_dialog_shown or any(popup is not None and popup.is_shown() for popup in popups)
+
+    def get_input(self, text: str) -> str:
+        """Asks the user for a text in an input dialog
+        :param text: the text shown above the entry
+        :return: str, the input or None if the dialog was cancelled
+        """
+        self.input_dialog_shown = True
+        try:
+            return ctk.CTkInputDialog(text=text, title="Input").get_input()
+        finally:
+            self.input_dialog_shown = False
+
+    def follow_listener(self):
+        """Switches to the configurations the listener publishes in shared memory, unless a dialog is open
+        """
+        if not self.is_dialog_shown():
+            for name, manager in self.configuration_managers.items():
+                sequence = manager.follow_active_state(self.listener_sequences[name])
+                if sequence != self.listener_sequences[name]:
+                    self.listener_sequences[name] = sequence
+                    if manager is self.configuration_manager:
+                        self.update_configuration_name_and_buttons()
+        self.root.after(STATE_POLL_INTERVAL, self.follow_listener)
+
     def update_configuration_name_and_buttons(self):
-        self.config_label.configure(text=self.configuration_manager.get_configuration().name)
+        name = self.configuration_manager.get_configuration().name
+        if self.configuration_manager.locked_configuration:
+            name = f"{name} (locked)"
+        self.config_label.configure(text=name)
         self.update_buttons()
 
     def record_macro(self, key: str) -> None:
@@ -143,62 +258,73 @@ class GUI:
         function = KeyFunction(recording, FunctionType.MACRO)
         self.configuration_manager.update_key(key, function)
 
-    def create_edit_popup(self, key: str) -> ctk.CTkToplevel:
-        """Create the edit popup window for a key
-        :param key: the key which was pressed to trigger the popup
-        :return: ctk.CTkToplevel window for the popup
+    def create_edit_popup(self) -> Popup:
+        """Create the edit popup window, the key it edits is set in self.edit_key before it is shown
+        :return: Popup window for the popup
         """
-        popup_window = Popup(self.root, 300, 250)
+        popup_window = Popup(self.root, 300, 290)
         
         title_label = ctk.CTkLabel(popup_window, text="Change Button Function:")
         title_label.pack(pady=5)
         
-        current_function_label = ctk.CTkLabel(popup_window, font=("Helvetica", 20), text=self.configuration_manager.get_key_function(key).get_name())
-        current_function_label.pack(pady=5)
+        self.current_function_label = ctk.CTkLabel(popup_window, font=("Helvetica", 20), text="")
+        self.current_function_label.pack(pady=5)
         
         frame = ctk.CTkFrame(popup_window)
         frame.pack(fill=ctk.BOTH, expand=True, padx = 10, pady = 10)
         
         frame.grid_columnconfigure((0, 1), weight=1)
-        frame.grid_rowconfigure((0, 1, 2), weight=1)
+        frame.grid_rowconfigure((0, 1, 2, 3), weight=1)
 
-        edit_button = ctk.CTkButton(frame, text="Edit", command=lambda: self.handle_edit(key, popup_window))
+        edit_button = ctk.CTkButton(frame, text="Edit", command=lambda: self.handle_edit(self.edit_key, popup_window))
         edit_button.grid(row = 0, column = 0, columnspan=2, sticky="nsew", padx=5, pady=5)
 
-        abbreviation_button = ctk.CTkButton(frame, text="Abbreviation", command=lambda: self.create_abbreviation(key, popup_window))
+        abbreviation_button = ctk.CTkButton(frame, text="Abbreviation", command=lambda: self.create_abbreviation(self.edit_key, popup_window))
         abbreviation_button.grid(row = 1, column = 0, sticky="nsew", padx=5, pady=5)
 
-        lock_button = ctk.CTkButton(frame, text="Lock", command=lambda: self.handle_internal_function(key, LOCK, popup_window))
+        lock_button = ctk.CTkButton(frame, text="Lock", command=lambda: self.handle_internal_function(self.edit_key, LOCK, popup_window))
         lock_button.grid(row = 1, column = 1, sticky="nsew", padx=5, pady=5)
         
-        prev_button = ctk.CTkButton(frame, text="Prev", command=lambda: self.handle_internal_function(key, PREV, popup_window))
+        prev_button = ctk.CTkButton(frame, text="Prev", command=lambda: self.handle_internal_function(self.edit_key, PREV, popup_window))
         prev_button.grid(row = 2, column = 0, sticky="nsew", padx=5, pady=5)
 
-        next_button = ctk.CTkButton(frame, text="Next", command=lambda: self.handle_internal_function(key, NEXT, popup_window))
+        next_button = ctk.CTkButton(frame, text="Next", command=lambda: self.handle_internal_function(self.edit_key, NEXT, popup_window))
         next_button.grid(row=2, column = 1, sticky="nsew", padx=5, pady=5)
 
+        jump_button = ctk.CTkButton(frame, text="Jump", command=lambda: self.create_jump(self.edit_key, popup_window))
+        jump_button.grid(row=3, column = 0, columnspan=2, sticky="nsew", padx=5, pady=5)
+
         return popup_window
 
-    def handle_edit(self, key: str, popup_window: ctk.CTkToplevel):
+    def handle_edit(self, key: str, popup_window: Popup):
         self.record_macro(key)
-        popup_window.destroy()
+        popup_window.hide()
         self.update_buttons()
 
-    def handle_internal_function(self, key: str, function_type: str, popup_window: ctk.CTkToplevel):
+    def handle_internal_function(self, key: str, function_type: str, popup_window: Popup):
         function = KeyFunction(function_type, FunctionType.INTERNAL)
         self.configuration_manager.update_key(key, function)
-        popup_window.destroy()
+        popup_window.hide()
         self.update_buttons()
 
-    def create_abbreviation(self, key: str, popup_window: ctk.CTkToplevel):
-        name, abbreviation = AbbreviationDialog(self.root, 300, 300).get_input()
+    def create_jump(self, key: str, popup_window: Popup):
+        query = self.get_input("Input the configuration to jump to.")
+        if query:
+            self.handle_internal_function(key, f"{JUMP}{JUMP_SEPARATOR}{query}", popup_window)
+        else:
+            popup_window.hide()
+
+    def create_abbreviation(self, key: str, popup_window: Popup):
+        name, abbreviation, encrypted = self.abbreviation_dialog.get_input()
         if name and abbreviation:
+            if encrypted:
+                abbreviation = self.vault.store(abbreviation)
             function = KeyFunction(abbreviation, FunctionType.ABBREVIATION, name=name)
             self.configuration_manager.update_key(key, function)
-            popup_window.destroy()
+            popup_window.hide()
             self.update_buttons()
         else:
-            popup_window.destroy()
+            popup_window.hide()
 
 if __name__ == "__main__":
     gui = GUI()
@@ -20,7 +20,7 @@ class AbbreviationDialog(Popup):
 
         super().__init__(root, width, height, fg_color=fg_color, titlebar=True, **kwargs)
 
-        self._user_input = (None, None)
+        self._user_input = (None, None, False)
         self._running: bool = False
         self._title = title
         self._text = text
@@ -56,6 +56,11 @@ class AbbreviationDialog(Popup):
                                font=self._font)
         self._entry_second.grid(row=3, column=0, columnspan=2, padx=20, pady=(5, 20), sticky="nw")
         
+        self._encrypt_checkbox = ctk.CTkCheckBox(master=frame,
+                                    text='Encrypt',
+                                    font=self._font)
+        self._encrypt_checkbox.grid(row=4, column=0, columnspan=1, padx=(20, 10), pady=(0, 20), sticky="w")
+
         self._ok_button = ctk.CTkButton(master=frame,
                                     width=100,
                                     border_width=0,
@@ -64,19 +69,22 @@ class AbbreviationDialog(Popup):
                                     command=self._ok_event)
         self._ok_button.grid(row=4, column=1, columnspan=1, padx=(20, 10), pady=(0, 20), sticky="ew")
         
-        self.after(150, lambda: self._entry_first.focus())  # set focus to entry with slight delay, otherwise it won't work
         self._entry_first.bind("<Return>", lambda _: self._entry_second.focus())
         self._entry_second.bind("<Return>", self._ok_event)
         
     def _ok_event(self, event=None):
-        self._user_input = (self._entry_first.get(), self._entry_second.get())
-        self.grab_release()
-        self.destroy()
+        self._user_input = (self._entry_first.get(), self._entry_second.get(), bool(self._encrypt_checkbox.get()))
+        self.hide()
 
     def _cancel_event(self):
-        self.grab_release()
-        self.destroy()
+        self.hide()
 
     def get_input(self):
-        self.master.wait_window(self)
+        self._user_input = (None, None, False)
+        self._entry_first.delete(0, ctk.END)
+        self._entry_second.delete(0, ctk.END)
+        self._encrypt_checkbox.deselect()
+        self.show()
+        self.after(150, lambda: self._entry_first.focus())  # set focus to entry with slight delay, otherwise it won't work
+        self.wait_hidden()
         return self._user_input
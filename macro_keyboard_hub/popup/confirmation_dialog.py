@@ -61,13 +61,16 @@ class ConfirmationDialog(Popup):
         self._cancel_button.grid(row=1, column=1, columnspan=1, padx=(10, 20), pady=(0, 20), sticky="ew")
 
     def _ok_event(self, event=None):
-        self.grab_release()
-        self.destroy()
+        self._confirmed = True
+        self.hide()
 
     def _cancel_event(self):
-        self.grab_release()
-        self.destroy()
+        self.hide()
 
-    def get_confirmation(self):
-        self.master.wait_window(self)
+    def get_confirmation(self, text: str = None):
+        self._confirmed = False
+        if text is not None:
+            self._label.configure(text=text)
+        self.show()
+        self.wait_hidden()
         return self._confirmed
@@ -1,3 +1,5 @@
+import tkinter
+
 import customtkinter as ctk
 
 from macro_keyboard_hub.titlebar import TitleBar
@@ -6,22 +8,40 @@ class Popup(ctk.CTkToplevel):
     
     def __init__(self, root, width, height, titlebar = True, fg_color = None, **kwargs):
         super().__init__(fg_color=fg_color, **kwargs)
+        # popups are built hidden once and then shown and hidden again instead of being rebuilt on every use
+        self.withdraw()
         self.root = root
         self.width = width
         self.height = height
+        self._closed = tkinter.BooleanVar(self, value=True)
         # remove titlebar
         self.overrideredirect(True)
         if titlebar:
-            titlebar = TitleBar(self, title="")
+            titlebar = TitleBar(self, title="", command=self._on_closing)
             titlebar.pack(fill="both")
         
-        self._center()
-        
-        self.lift()  # lift window on top
         self.attributes("-topmost", True)  # stay on top
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
         self.resizable(False, False)
+
+    def show(self):
+        self._closed.set(False)
+        self._center()
+        self.deiconify()
+        self.lift()  # lift window on top
         self.grab_set()  # make other windows not clickable
+
+    def hide(self):
+        self.grab_release()
+        self.withdraw()
+        self._closed.set(True)
+
+    def is_shown(self):
+        return not self._closed.get()
+
+    def wait_hidden(self):
+        if not self._closed.get():
+            self.wait_variable(self._closed)
         
     def _center(self):
         # Calculate the center position of the main window
@@ -39,5 +59,4 @@ class Popup(ctk.CTkToplevel):
         self.geometry(f"{popup_width}x{popup_height}+{popup_x}+{popup_y}")
 
     def _on_closing(self):
-        self.grab_release()
-        self.destroy()
+        self.hide()
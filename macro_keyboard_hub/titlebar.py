@@ -10,8 +10,9 @@ BACKGROUND = "#1A1A1A"
 
 # Custom Title Bar
 class TitleBar(Frame):
-    def __init__(self, parent, title:str):
+    def __init__(self, parent, title:str, command=None):
         self.root = parent
+        self.command = command
         self.root.overrideredirect(True) # For Remove Default Title Bar
         super().__init__(parent, bg=BACKGROUND)
         self.nav_title = Label(self, text=title, foreground=WHITE, background=BACKGROUND)
@@ -40,4 +41,7 @@ class TitleBar(Frame):
         self.root.geometry(f"+{self.x}+{self.y}")
     
     def close_window(self):
-        self.root.destroy()
+        if self.command is not None:
+            self.command()
+        else:
+            self.root.destroy()
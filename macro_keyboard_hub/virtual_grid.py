@@ -0,0 +1,131 @@
+import math
+from typing import Callable, List, Optional, Tuple
+
+import customtkinter as ctk
+
+ROW_HEIGHT = 60
+CELL_PADDING = 5
+
+
+class VirtualGrid(ctk.CTkFrame):
+
+    def __init__(self, master, command: Callable[[str], None], row_height: int = ROW_HEIGHT, **kwargs):
+        """Scrollable grid of key buttons that only creates buttons for the rows that are visible and reuses them
+        while scrolling, so large layouts cost as much as the visible part of them
+        :param master: the parent widget
+        :param command: called with the key of a button when it is pressed
+        :param row_height: the minimal height of a row in pixels
+        """
+        super().__init__(master, **kwargs)
+        self.command = command
+        self.row_height = row_height
+        self.rows: List[List[Tuple[str, str]]] = []
+        self.columns = 0
+        self.first_row = 0
+        self.pool: List[List[ctk.CTkButton]] = []
+        self.slot_keys = {}
+
+        self.cells = ctk.CTkFrame(self, fg_color="transparent")
+        self.cells.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.cells.bind("<Configure>", lambda _: self.render())
+        self.__bind_scroll(self.cells)
+
+    def set_rows(self, rows: List[List[Tuple[str, str]]]) -> None:
+        """Replaces the content of the grid
+        :param rows: rows of (key, text) tuples, one per button
+        """
+        self.rows = rows
+        self.columns = max((len(row) for row in rows), default=0)
+        self.first_row = min(self.first_row, max(len(rows) - 1, 0))
+        self.render()
+
+    def yview(self, *args) -> None:
+        """Scrolls the grid, called by the scrollbar
+        :param args: ("moveto", fraction) or ("scroll", amount, "units" or "pages")
+        """
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount = amount * self.__get_full_row_count()
+            self.scroll_to(self.first_row + amount)
+
+    def scroll_to(self, row: int) -> None:
+        """Shows the rows starting at the given row
+        :param row: index of the first visible row
+        """
+        row = max(0, min(row, len(self.rows) - self.__get_full_row_count()))
+        if row != self.first_row:
+            self.first_row = row
+            self.render()
+
+    def render(self) -> None:
+        """Places the pooled buttons on the visible cells and hides the unused ones
+        """
+        height = max(self.cells.winfo_height(), 1)
+        padding_x = CELL_PADDING / max(self.cells.winfo_width(), 1)
+        padding_y = CELL_PADDING / height
+        full_rows = self.__get_full_row_count()
+        self.first_row = max(0, min(self.first_row, len(self.rows) - full_rows))
+        shown_rows = min(math.ceil(height / self.row_height), len(self.rows) - self.first_row)
+        row_height = height / len(self.rows) if self.rows and len(self.rows) <= full_rows else self.row_height
+        self.__ensure_pool(shown_rows, self.columns)
+        for slot_row, buttons in enumerate(self.pool):
+            row_index = self.first_row + slot_row
+            row = self.rows[row_index] if slot_row < shown_rows else []
+            for slot_column, button in enumerate(buttons):
+                if slot_column >= len(row):
+                    button.place_forget()
+                    self.slot_keys.pop((slot_row, slot_column), None)
+                    continue
+                key, text = row[slot_column]
+                self.slot_keys[(slot_row, slot_column)] = key
+                if button.cget("text") != text:
+                    button.configure(text=text)
+                # customtkinter widgets do not accept width and height in place, so everything is relative
+                button.place(relx=slot_column / len(row) + padding_x, rely=slot_row * row_height / height + padding_y,
+                             relwidth=1 / len(row) - 2 * padding_x, relheight=row_height / height - 2 * padding_y)
+        if len(self.rows) > full_rows:
+            self.scrollbar.pack(side=ctk.RIGHT, fill=ctk.Y, before=self.cells)
+            self.scrollbar.set(self.first_row / len(self.rows), (self.first_row + full_rows) / len(self.rows))
+        else:
+            self.scrollbar.pack_forget()
+
+    def __get_full_row_count(self) -> int:
+        """Returns how many rows fit completely into the grid
+        :return: number of rows that are fully visible, at least one
+        """
+        return max(self.cells.winfo_height() // self.row_height, 1)
+
+    def __ensure_pool(self, rows: int, columns: int) -> None:
+        """Creates pooled buttons until there is one for every visible cell, buttons are never destroyed
+        :param rows: the number of visible rows
+        :param columns: the number of columns of the widest row
+        """
+        while len(self.pool) < rows:
+            self.pool.append([])
+        for slot_row, buttons in enumerate(self.pool):
+            while len(buttons) < columns:
+                slot = (slot_row, len(buttons))
+                button = ctk.CTkButton(self.cells, text="", command=lambda s=slot: self.__click(s),
+                                       corner_radius=10, fg_color="#2E2E2E", hover_color="#3E3E3E")
+                self.__bind_scroll(button)
+                buttons.append(button)
+
+    def __click(self, slot: Tuple[int, int]) -> None:
+        """Calls the command with the key currently shown on a pooled button
+        :param slot: row and column of the pooled button
+        """
+        key: Optional[str] = self.slot_keys.get(slot)
+        if key is not None:
+            self.command(key)
+
+    def __bind_scroll(self, widget) -> None:
+        """Scrolls the grid with the mouse wheel while the pointer is over the widget
+        :param widget: the widget to bind the mouse wheel on
+        """
+        widget.bind("<MouseWheel>", lambda event: self.scroll_to(self.first_row - int(event.delta / 120)))
+        widget.bind("<Button-4>", lambda _: self.scroll_to(self.first_row - 1))
+        widget.bind("<Button-5>", lambda _: self.scroll_to(self.first_row + 1))
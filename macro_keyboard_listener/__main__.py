@@ -1,10 +1,15 @@
+import argparse
+import asyncio
 import logging
+import sys
 
 from dotenv import load_dotenv
 import os
 
-from macro_keyboard_configuration_management.constants import LOGGING_FILE_NAME
+from macro_keyboard_configuration_management.constants import LOGGING_FILE_NAME, SELFTEST_RATE, SELFTEST_DURATION, \
+    LOADTEST_RATE, LOADTEST_DURATION, LATENCY_BUDGET_P99, CPU_BUDGET
 from macro_keyboard_listener.listener import MacroKeyboard
+from macro_keyboard_listener.selftest import LoadTest
 
 
 def __init_env() -> None:
@@ -18,13 +23,51 @@ def __init_env() -> None:
             ])
 
 
+def __parse_arguments() -> argparse.Namespace:
+    """Parses the command line arguments of the listener
+    :return: the parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="listener")
+    parser.add_argument("configuration_path", nargs="?", default="configuration",
+                        help="directory observed for configuration changes")
+    parser.add_argument("--profile", action="store_true",
+                        help="run the sampling profiler from the start, toggle it with the PROFILE key function")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--selftest", action="store_true",
+                      help="check the listener against a fake keyboard and a temporary configuration, then exit")
+    mode.add_argument("--loadtest", action="store_true",
+                      help="drive synthetic traffic at the listener and report latency, dropped events and cpu time")
+    parser.add_argument("--rate", type=float, help="key presses per second of the self or load test")
+    parser.add_argument("--duration", type=float, help="seconds of traffic of the self or load test")
+    parser.add_argument("--p99-budget", type=float, default=LATENCY_BUDGET_P99,
+                        help="allowed 99th percentile of the key press latency in milliseconds")
+    parser.add_argument("--cpu-budget", type=float, default=CPU_BUDGET,
+                        help="allowed cpu time per second of traffic")
+    return parser.parse_args()
+
+
+def __run_test(arguments: argparse.Namespace) -> int:
+    """Runs the self test or the load test
+    :param arguments: the parsed arguments
+    :return: the exit code of the test
+    """
+    default_rate, default_duration = (SELFTEST_RATE, SELFTEST_DURATION) if arguments.selftest \
+        else (LOADTEST_RATE, LOADTEST_DURATION)
+    test = LoadTest(arguments.rate or default_rate, arguments.duration or default_duration, arguments.p99_budget,
+                    arguments.cpu_budget, checks=arguments.selftest, profile=arguments.profile)
+    return test.run()
+
+
 if __name__ == "__main__":
+    arguments = __parse_arguments()
     __init_env()
     load_dotenv()
     logging.basicConfig(format='%(asctime)s  %(levelname)s:%(message)s', filemode='w', filename=LOGGING_FILE_NAME,
                         encoding='utf-8', level=logging.DEBUG)
     logging.info("Environment file loaded")
+    if arguments.selftest or arguments.loadtest:
+        sys.exit(__run_test(arguments))
     try:
-        MacroKeyboard()
+        asyncio.run(MacroKeyboard(arguments.configuration_path, arguments.profile).run())
     except Exception as e:
         logging.warning(e)
@@ -1,87 +1,278 @@
+import asyncio
 import logging
 import os
-import queue
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from threading import Thread
-from typing import Callable
+from typing import Callable, Dict, Hashable, Optional, Tuple
 
 import keyboard
-import sys
-import time
 
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager, FunctionType, \
-    KeyFunction
-from macro_keyboard_configuration_management.constants import MACRO_KEYBOARD_FILE_TYPE, NEXT, PREV, LOCK
-from macro_keyboard_listener.windows_event_handler import WindowsEventHandler
+    KeyFunction, RepeatMode, RepeatPolicy
+from macro_keyboard_configuration_management.device import read_devices
+from macro_keyboard_configuration_management.vault import AbbreviationVault
+from macro_keyboard_configuration_management.constants import MACRO_KEYBOARD_FILE_TYPE, JOURNAL_FILE_TYPE, NEXT, PREV, \
+    LOCK, JUMP, JUMP_SEPARATOR, PROFILE, ACTION_QUEUE_SIZE, SEQUENCE_SEPARATOR, RELOAD_ACTION
+from macro_keyboard_listener.profiler import SamplingProfiler
+from macro_keyboard_listener.repeat import KeyRepeater
+from macro_keyboard_listener.sequence import SequenceMachine
+from macro_keyboard_listener.timer_wheel import TimerWheel
 import PySimpleGUI as Psg
 
 
 class MacroKeyboard:
-    def __init__(self) -> None:
-        """Initializes the MacroKeyboard with its configuration manager and loads the functions from there
+    def __init__(self, configuration_path: str = "configuration", profile: bool = False, keyboard_backend=keyboard,
+                 foreground_handler_factory: Callable = None, popups: bool = True,
+                 profiler: SamplingProfiler = None) -> None:
+        """Initializes the MacroKeyboard with one configuration manager per device and loads the functions from there.
+        Key presses, file changes and focus changes all end up as actions on a single asyncio event loop, which runs
+        them one after another on the action thread, so configurations and hotkeys are only changed from there
+        :param configuration_path: the directory observed for configuration changes
+        :param profile: if the sampling profiler should run from the start
+        :param keyboard_backend: module or object providing the hotkey and output functions of the keyboard package
+        :param foreground_handler_factory: called with the configuration managers, update_hotkeys and submit to create
+        the foreground window handler, the WindowsEventHandler if not given and enabled in the environment
+        :param popups: if configuration changes should be shown in popups
+        :param profiler: the sampling profiler toggled by the PROFILE key function, one writing next to the log file
+        if not given
         """
         self.recording = False
-        self.configuration_manager = ConfigurationManager()
-        self.popup_queue = queue.LifoQueue()
-        self.update_hotkeys(init=True)
-        self.__observe()
-        if os.getenv("USE_FOREGROUND_WINDOW_DETECTION", "False").lower() == "true":
-            Thread(target=lambda: WindowsEventHandler(self.configuration_manager, self.update_hotkeys)).start()
-        self.handle_queue()
+        self.configuration_path = configuration_path
+        self.keyboard_backend = keyboard_backend
+        self.foreground_handler_factory = foreground_handler_factory
+        self.popups = popups
+        self.profiler = profiler if profiler is not None else SamplingProfiler()
+        if profile:
+            self.profiler.start()
+        self.sequence_machine = None
+        self.timer_wheel = TimerWheel()
+        self.repeater = KeyRepeater(self.timer_wheel, keyboard_backend.is_pressed)
+        self.vault = AbbreviationVault()
+        self.configuration_managers = [ConfigurationManager(device) for device in read_devices()]
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.actions: Optional[asyncio.Queue] = None
+        self.stopping: Optional[asyncio.Event] = None
+        self.popup_event: Optional[asyncio.Event] = None
+        self.popup_item = None
+        self.pending_outputs = 0
+        self.coalesced_actions: Dict[Hashable, Callable] = {}
+        self.dropped_actions = 0
+        self.action_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="actions")
+        self.popup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="popups")
         logging.info("MacroKeyboard initialized")
 
-    def handle_queue(self):
-        """Runs forever and handles the queue for popups
-        :return:
+    async def run(self) -> None:
+        """Runs the listener until stop is called, then shuts down all sources and joins their threads
+        """
+        self.loop = asyncio.get_running_loop()
+        self.actions = asyncio.Queue()
+        self.stopping = asyncio.Event()
+        self.popup_event = asyncio.Event()
+        self.update_hotkeys(init=True)
+        observer = self.__observe()
+        foreground_handler = None
+        focus_thread = None
+        factory = self.foreground_handler_factory
+        if factory is None and os.getenv("USE_FOREGROUND_WINDOW_DETECTION", "False").lower() == "true":
+            from macro_keyboard_listener.windows_event_handler import WindowsEventHandler
+            factory = WindowsEventHandler
+        if factory is not None:
+            foreground_handler = factory(self.configuration_managers, self.update_hotkeys, self.submit)
+            focus_thread = Thread(target=foreground_handler.run, name="focus")
+            focus_thread.start()
+        self.__add_signal_handlers()
+        tasks = [asyncio.create_task(self.handle_actions())]
+        if self.popups:
+            tasks.append(asyncio.create_task(self.handle_popups()))
+        logging.info("MacroKeyboard running")
+        try:
+            await self.stopping.wait()
+        finally:
+            logging.info("MacroKeyboard shutting down")
+            self.keyboard_backend.unhook_all()
+            observer.stop()
+            if foreground_handler is not None:
+                foreground_handler.stop()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.loop.run_in_executor(None, observer.join)
+            if focus_thread is not None:
+                await self.loop.run_in_executor(None, focus_thread.join)
+            self.timer_wheel.stop()
+            self.action_executor.shutdown(wait=True)
+            self.popup_executor.shutdown(wait=True)
+            self.profiler.stop()
+            logging.info("MacroKeyboard stopped")
+
+    def stop(self) -> None:
+        """Requests a graceful shutdown, can be called from any thread
+        """
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stopping.set)
+
+    def submit(self, action: Callable, output: bool = False, coalesce: Hashable = None) -> None:
+        """Queues an action to run on the action thread, can be called from any thread. Only key output is dropped if
+        the action thread cannot keep up, changes of the configuration are always run
+        :param action: the callable to run
+        :param output: if the action only writes keys, dropped if ACTION_QUEUE_SIZE outputs are waiting already
+        :param coalesce: actions with the same value that wait at the same time run only once, the latest of them
+        """
+        self.loop.call_soon_threadsafe(self.__enqueue, action, output, coalesce)
+
+    def show_popup(self, item) -> None:
+        """Shows a popup, only the latest popup is shown if several are requested while one is visible
+        :param item: the name of the new configuration or a tuple of name and lock state
+        """
+        if self.popups:
+            self.loop.call_soon_threadsafe(self.__set_popup, item)
+
+    async def handle_actions(self) -> None:
+        """Runs the queued actions one after another on the action thread
+        """
+        while True:
+            action, output, coalesce = await self.actions.get()
+            if output:
+                self.pending_outputs = self.pending_outputs - 1
+            if coalesce is not None:
+                action = self.coalesced_actions.pop(coalesce)
+            try:
+                await self.loop.run_in_executor(self.action_executor, action)
+            except Exception as e:
+                logging.warning(e)
+
+    async def handle_popups(self) -> None:
+        """Shows the latest requested popup whenever one is requested
         """
         while True:
-            item = self.popup_queue.get()
+            await self.popup_event.wait()
+            self.popup_event.clear()
+            item = self.popup_item
             if type(item) is str:
-                self.__show_configuration_popup(item)
-            elif type(item) is bool:
-                self.__show_configuration_lock_popup(item)
-            with self.popup_queue.mutex:
-                self.popup_queue.queue.clear()
-
-    def update_hotkeys(self, init=False, popup=True) -> None:
-        """Update the hotkeys for the keyboard package, used every time the configuration changes
+                await self.loop.run_in_executor(self.popup_executor, self.__show_configuration_popup, item)
+            elif type(item) is tuple:
+                await self.loop.run_in_executor(self.popup_executor, self.__show_configuration_lock_popup, *item)
+
+    def __enqueue(self, action: Callable, output: bool, coalesce: Hashable) -> None:
+        """Puts an action into the queue, drops key output if the action thread cannot keep up and replaces a waiting
+        action with the same coalesce value
+        :param action: the callable to run
+        :param output: if the action only writes keys
+        :param coalesce: the value identifying actions that only need to run once, None to always run the action
+        """
+        if output and self.pending_outputs >= ACTION_QUEUE_SIZE:
+            self.dropped_actions = self.dropped_actions + 1
+            logging.warning(f"Action queue is full, dropped {self.dropped_actions} key outputs so far")
+            return
+        if coalesce is not None:
+            waiting = coalesce in self.coalesced_actions
+            self.coalesced_actions[coalesce] = action
+            if waiting:
+                logging.debug(f"Coalesced action {coalesce} with the waiting one")
+                return
+        if output:
+            self.pending_outputs = self.pending_outputs + 1
+        self.actions.put_nowait((action, output, coalesce))
+
+    def __set_popup(self, item) -> None:
+        """Replaces the popup to show next
+        :param item: the name of the new configuration or a tuple of name and lock state
+        """
+        self.popup_item = item
+        self.popup_event.set()
+
+    def __add_signal_handlers(self) -> None:
+        """Stops the listener gracefully on SIGINT and SIGTERM
+        """
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(signal_number, self.stopping.set)
+            except NotImplementedError:
+                signal.signal(signal_number, lambda *_: self.stop())
+
+    def update_hotkeys(self, init=False, popup=True, configuration_manager: ConfigurationManager = None) -> None:
+        """Update the hotkeys for the keyboard package, used every time the configuration changes. The active
+        configurations of all devices are combined into a single lookup table, so every key event costs the same
+        no matter how many devices there are. Key events pass the KeyRepeater first, which applies the repeat policies
+        of single hotkeys
         :param popup: if popup should be shown
         :param init: if it is the first initialization (throws error if no hotkey exists)
+        :param configuration_manager: the manager whose configuration changed, shown in the popup
         """
-        try:
-            self.configuration_manager.get_configuration()
-        except IndexError as ie:
-            logging.warning(ie)
+        sequences: Dict[str, Callable] = {}
+        policies: Dict[str, Tuple[RepeatPolicy, Callable]] = {}
+        for manager in self.configuration_managers:
+            try:
+                configuration = manager.get_configuration()
+            except IndexError as ie:
+                logging.warning(ie)
+                continue
+            for key, function in configuration.keys.items():
+                if not manager.device.owns(key):
+                    logging.debug(f"Key {key} is not in the layout of device {manager.device.name}")
+                    continue
+                if key in sequences:
+                    logging.warning(f"Key {key} of device {manager.device.name} is already used by another device")
+                    continue
+                sequences[key] = partial(self.submit, self.__get_function_for_key_function(function, manager),
+                                         function.function_type != FunctionType.INTERNAL)
+                if function.repeat.mode != RepeatMode.OS and SEQUENCE_SEPARATOR not in key:
+                    policies[key] = (function.repeat, sequences[key])
+        if not sequences:
             return
         if not init:
-            keyboard.remove_all_hotkeys()
-        for key, function in self.configuration_manager.get_configuration().keys.items():
-            keyboard.add_hotkey(key, self.__get_function_for_key_function(function), suppress=True)
+            self.keyboard_backend.remove_all_hotkeys()
+        self.sequence_machine = SequenceMachine(sequences, timer_wheel=self.timer_wheel)
+        self.repeater.set_policies(policies)
+        for step in self.sequence_machine.get_steps():
+            self.keyboard_backend.add_hotkey(step, self.repeater.press, args=(step, self.sequence_machine.feed),
+                                             suppress=True)
+        for step in policies.keys():
+            self.keyboard_backend.add_hotkey(step, self.repeater.release, args=(step,), suppress=True,
+                                             trigger_on_release=True)
+        for manager in self.configuration_managers:
+            manager.publish_active_state()
         if popup:
-            self.popup_queue.put(f"{self.configuration_manager.get_configuration().name}")
+            manager = configuration_manager if configuration_manager is not None else self.configuration_managers[0]
+            self.show_popup(f"{manager.get_configuration().name}")
         logging.info("Hotkeys updated")
 
-    def __get_function_for_key_function(self, key_function: KeyFunction) -> Callable:
+    def __get_function_for_key_function(self, key_function: KeyFunction,
+                                        configuration_manager: ConfigurationManager) -> Callable:
         """returns callable to run for a key
         :param key_function: the KeyFunction we want to create the callable for
+        :param configuration_manager: the manager of the device the key belongs to
         :return: Callable
         """
         if key_function.function_type == FunctionType.MACRO:
-            return lambda: keyboard.press_and_release(key_function.arg)
+            return lambda: self.keyboard_backend.press_and_release(key_function.arg)
         elif key_function.function_type == FunctionType.ABBREVIATION:
-            return lambda: keyboard.write(key_function.arg)
+            if AbbreviationVault.is_reference(key_function.arg):
+                return lambda: self.keyboard_backend.write(self.vault.get(key_function.arg))
+            return lambda: self.keyboard_backend.write(key_function.template.render())
         elif key_function.function_type == FunctionType.INTERNAL:
             def callback():
-                if key_function.arg.endswith(PREV):
-                    self.configuration_manager.previous_configuration()
-                    self.update_hotkeys()
+                jump, separator, query = key_function.arg.partition(JUMP_SEPARATOR)
+                if separator and jump.endswith(JUMP):
+                    if configuration_manager.jump_to_configuration(query):
+                        self.update_hotkeys(configuration_manager=configuration_manager)
+                elif key_function.arg.endswith(PREV):
+                    configuration_manager.previous_configuration()
+                    self.update_hotkeys(configuration_manager=configuration_manager)
                 elif key_function.arg.endswith(NEXT):
-                    self.configuration_manager.next_configuration()
-                    self.update_hotkeys()
+                    configuration_manager.next_configuration()
+                    self.update_hotkeys(configuration_manager=configuration_manager)
                 elif key_function.arg.endswith(LOCK):
-                    locked = self.configuration_manager.toggle_configuration_lock()
-                    self.popup_queue.put(locked)
+                    locked = configuration_manager.toggle_configuration_lock()
+                    self.vault.wipe()
+                    configuration_manager.publish_active_state()
+                    self.show_popup((configuration_manager.get_configuration().name, locked))
+                elif key_function.arg.endswith(PROFILE):
+                    self.profiler.toggle()
             return callback
 
     @staticmethod
@@ -91,21 +282,23 @@ class MacroKeyboard:
         Psg.popup_auto_close(f"Configuration changed to {name}", font="Arial", background_color="black",
                              button_type=Psg.POPUP_BUTTONS_NO_BUTTONS, no_titlebar=True, auto_close_duration=1)
 
-    def __show_configuration_lock_popup(self, locked) -> None:
+    @staticmethod
+    def __show_configuration_lock_popup(name, locked) -> None:
         """Shows a psg popup with the current configuration
             """
-        Psg.popup_auto_close(f'Configuration {self.configuration_manager.get_configuration().name} is now '
+        Psg.popup_auto_close(f'Configuration {name} is now '
                              f'{"locked" if locked else "unlocked"}', font="Arial", background_color="black",
                              button_type=Psg.POPUP_BUTTONS_NO_BUTTONS, no_titlebar=True, auto_close_duration=1)
 
-    def __observe(self) -> None:
+    def __observe(self) -> Observer:
         """Observes the current directory for changes, used to react to configuration changes made in the GUI
+        :return: the started watchdog observer
         """
-        path = sys.argv[1] if len(sys.argv) > 1 else 'configuration'
         event_handler = KeyboardEventHandler(self)
         observer = Observer()
-        observer.schedule(event_handler, path, recursive=False)
+        observer.schedule(event_handler, self.configuration_path, recursive=False)
         observer.start()
+        return observer
 
 
 class KeyboardEventHandler(FileSystemEventHandler):
@@ -115,19 +308,41 @@ class KeyboardEventHandler(FileSystemEventHandler):
         :param macro_keyboard: The keyboard we want to apply changes to
         """
         self.keyboard = macro_keyboard
-        self.last_updated = 0
         super().__init__()
 
     def on_modified(self, event: FileSystemEvent) -> None:
-        """Triggered when a file or directory in this directory was modified
+        """Triggered when a file or directory in this directory was modified, the reload runs on the action thread
         :param event: the Modification Event triggered
         """
         logging.debug("Modification detected")
-        if time.time() - self.last_updated <= 1:
-            logging.info("Modification detected but still on cooldown")
-            return
-        if event.src_path.endswith(MACRO_KEYBOARD_FILE_TYPE):
-            self.keyboard.configuration_manager.read_configuration()
-            self.keyboard.update_hotkeys()
-            self.last_updated = time.time()
-            logging.info("Modification detected and updated")
+        self.__handle_change(event.src_path)
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        """Triggered when a file in this directory was renamed, the configuration file is replaced that way when the
+        journal is compacted
+        :param event: the Move Event triggered
+        """
+        logging.debug("Move detected")
+        self.__handle_change(event.dest_path)
+
+    def __handle_change(self, path: str) -> None:
+        """Queues a reload of the device whose configuration file or journal changed, a single save causes several
+        events, so there is at most one waiting reload per device. Reloads are never dropped, otherwise the listener
+        would keep the hotkeys of an old configuration
+        :param path: the path of the changed file
+        """
+        if path.endswith((MACRO_KEYBOARD_FILE_TYPE, JOURNAL_FILE_TYPE)):
+            for configuration_manager in self.keyboard.configuration_managers:
+                file_names = [os.path.basename(file_name) for file_name in configuration_manager.device.get_file_names()]
+                if os.path.basename(path) in file_names:
+                    self.keyboard.submit(partial(self.reload, configuration_manager),
+                                         coalesce=(RELOAD_ACTION, configuration_manager.device.name))
+            logging.info("Modification detected and queued")
+
+    def reload(self, configuration_manager: ConfigurationManager) -> None:
+        """Reloads the configurations of a device and its hotkeys
+        :param configuration_manager: the manager of the device whose file changed
+        """
+        configuration_manager.read_configuration()
+        self.keyboard.update_hotkeys(configuration_manager=configuration_manager)
+        logging.info("Modification detected and updated")
@@ -0,0 +1,113 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from macro_keyboard_configuration_management.constants import LOGGING_FILE_NAME, PROFILER_INTERVAL
+
+PROFILE_TOP_ENTRIES = 40
+
+
+class SamplingProfiler:
+
+    def __init__(self, interval: float = PROFILER_INTERVAL, directory: str = None) -> None:
+        """Low overhead sampling profiler for the running listener, it records the stacks of all threads in fixed
+        intervals and writes them as collapsed stacks that flamegraph tools can read directly
+        :param interval: seconds between two samples
+        :param directory: where the profiles are written, next to the log file if not given. It is resolved here, so
+        changing the working directory later does not move the profiles
+        """
+        self.interval = interval
+        self.directory = os.path.abspath(directory) if directory is not None else \
+            os.path.dirname(os.path.abspath(LOGGING_FILE_NAME))
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def is_running(self) -> bool:
+        """Returns whether the profiler is currently sampling
+        :return: True if sampling
+        """
+        return self.thread is not None
+
+    def start(self) -> None:
+        """Starts sampling in a background thread
+        """
+        if self.is_running():
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self.started = time.time()
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.__sample, name="profiler", daemon=True)
+        self.thread.start()
+        logging.info("Profiler started")
+
+    def stop(self) -> Optional[str]:
+        """Stops sampling and writes the profile and the collapsed stacks into the directory of the profiler
+        :return: the path of the collapsed stack file or None if the profiler was not running
+        """
+        if not self.is_running():
+            return None
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+        prefix = os.path.join(self.directory, f"profile-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}")
+        with open(f"{prefix}.collapsed", "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as file:
+            file.write(self.__get_summary())
+        logging.info(f"Profiler stopped after {self.samples} samples, written to {prefix}")
+        return f"{prefix}.collapsed"
+
+    def toggle(self) -> bool:
+        """Starts the profiler if it is stopped and stops it otherwise
+        :return: True if the profiler is running now
+        """
+        if self.is_running():
+            self.stop()
+        else:
+            self.start()
+        return self.is_running()
+
+    def __sample(self) -> None:
+        """Records the stacks of all other threads until the profiler is stopped
+        """
+        own_id = threading.get_ident()
+        while not self.stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def __get_summary(self) -> str:
+        """Returns a readable profile with the functions that were sampled most often
+        :return: str, the summary
+        """
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        lines = [f"{self.samples} samples every {self.interval * 1000:.1f} ms", "", "own samples:"]
+        lines += [f"{count:8d}  {frame}" for frame, count in own.most_common(PROFILE_TOP_ENTRIES)]
+        lines += ["", "total samples:"]
+        lines += [f"{count:8d}  {frame}" for frame, count in total.most_common(PROFILE_TOP_ENTRIES)]
+        return "\n".join(lines) + "\n"
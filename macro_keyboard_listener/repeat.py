@@ -0,0 +1,117 @@
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+
+from macro_keyboard_configuration_management.configuration_manager import RepeatMode, RepeatPolicy, \
+    DEFAULT_REPEAT_POLICY
+from macro_keyboard_configuration_management.constants import REPEAT_RELEASE_CHECK_INTERVAL
+from macro_keyboard_listener.timer_wheel import TimerWheel, WheelTimer
+
+
+class HeldKey:
+    __slots__ = ("policy", "action", "repetitions", "due", "timer")
+
+    def __init__(self, policy: RepeatPolicy, action: Optional[Callable]) -> None:
+        """A hotkey that is held down
+        :param policy: the repeat policy of its function
+        :param action: the callable to repeat, None if the function is not repeated
+        """
+        self.policy = policy
+        self.action = action
+        self.repetitions = 0
+        self.due = 0.0
+        self.timer: Optional[WheelTimer] = None
+
+
+class KeyRepeater:
+
+    def __init__(self, timer_wheel: TimerWheel, is_pressed: Callable[[str], bool] = None) -> None:
+        """Applies the repeat policies of the key functions while their hotkeys are held down. Only hotkeys with a NONE
+        or CUSTOM policy are tracked, the repeated key events of the operating system are swallowed for them and CUSTOM
+        policies are repeated by the timer wheel instead
+        :param timer_wheel: the wheel running the repetitions of all held keys
+        :param is_pressed: returns whether a hotkey is still held, used to stop tracking a key if its release was missed,
+        e.g. if the modifier of a combination was released first
+        """
+        self.timer_wheel = timer_wheel
+        self.is_pressed = is_pressed
+        self.lock = threading.Lock()
+        self.policies: Dict[str, Tuple[RepeatPolicy, Callable]] = {}
+        self.held: Dict[str, HeldKey] = {}
+
+    def set_policies(self, policies: Dict[str, Tuple[RepeatPolicy, Callable]]) -> None:
+        """Replaces the repeat policies after the hotkeys changed, keys that are held stop repeating
+        :param policies: mapping of hotkeys to their repeat policy and the callable to repeat, hotkeys that are not
+        in it keep the repetitions of the operating system
+        """
+        with self.lock:
+            for held_key in self.held.values():
+                if held_key.timer is not None:
+                    self.timer_wheel.cancel(held_key.timer)
+            self.held.clear()
+            self.policies = policies
+
+    def press(self, step: str, feed: Callable[[str], None]) -> None:
+        """Handles a key down event of a hotkey, called by the keyboard hook for the first press and every repetition
+        of the operating system
+        :param step: the hotkey
+        :param feed: called with the hotkey if the event is passed on
+        """
+        with self.lock:
+            if step in self.held:
+                return
+            policy, action = self.policies.get(step, (DEFAULT_REPEAT_POLICY, None))
+            if policy.mode != RepeatMode.OS:
+                held_key = HeldKey(policy, action if policy.mode == RepeatMode.CUSTOM else None)
+                self.held[step] = held_key
+                if held_key.action is not None:
+                    held_key.due = time.monotonic() + policy.delay
+                    held_key.timer = self.timer_wheel.schedule(policy.delay, partial(self.__repeat, step, held_key))
+                elif self.is_pressed is not None:
+                    held_key.timer = self.timer_wheel.schedule(REPEAT_RELEASE_CHECK_INTERVAL,
+                                                               partial(self.__check_released, step, held_key))
+        feed(step)
+
+    def release(self, step: str) -> None:
+        """Handles the release of a hotkey and stops its repetitions
+        :param step: the hotkey
+        """
+        with self.lock:
+            held_key = self.held.pop(step, None)
+            if held_key is not None and held_key.timer is not None:
+                self.timer_wheel.cancel(held_key.timer)
+
+    def __repeat(self, step: str, held_key: HeldKey) -> None:
+        """Runs a repetition and schedules the next one, the next due time follows from the previous due time, so the
+        latency of the wheel does not add up
+        :param step: the hotkey
+        :param held_key: the state of the hotkey when the repetition was scheduled
+        """
+        if self.is_pressed is not None and not self.is_pressed(step):
+            self.release(step)
+            return
+        with self.lock:
+            if self.held.get(step) is not held_key:
+                return
+            held_key.due = held_key.due + held_key.policy.get_interval(held_key.repetitions)
+            held_key.repetitions = held_key.repetitions + 1
+            held_key.timer = self.timer_wheel.schedule(held_key.due - time.monotonic(),
+                                                       partial(self.__repeat, step, held_key))
+        held_key.action()
+
+    def __check_released(self, step: str, held_key: HeldKey) -> None:
+        """Releases a hotkey that is not repeated once it is no longer held, otherwise it would swallow all further
+        presses if its release was missed
+        :param step: the hotkey
+        :param held_key: the state of the hotkey when the check was scheduled
+        """
+        pressed = self.is_pressed(step)
+        with self.lock:
+            if self.held.get(step) is not held_key:
+                return
+            if not pressed:
+                del self.held[step]
+                return
+            held_key.timer = self.timer_wheel.schedule(REPEAT_RELEASE_CHECK_INTERVAL,
+                                                       partial(self.__check_released, step, held_key))
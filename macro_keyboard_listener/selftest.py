@@ -0,0 +1,407 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from macro_keyboard_configuration_management.active_state import ActiveState
+from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager, FunctionType, \
+    KeyFunction, RepeatPolicy
+from macro_keyboard_configuration_management.constants import DEFAULT_CONFIG_KEYS, DEFAULT_DEVICE_NAME, \
+    DEFAULT_FILE_NAME, DEFAULT_LAYOUT, DEVICES_FILE_NAME, STATE_FILE_NAME, LATENCY_BUDGET_P99, CPU_BUDGET, \
+    FOCUS_ACTION
+from macro_keyboard_listener.listener import MacroKeyboard
+from macro_keyboard_listener.profiler import SamplingProfiler
+
+PROFILE_NAMES = ["default", "chrome", "explorer"]
+FOCUS_EXECUTABLES = ["chrome.exe", "explorer.exe", "notepad.exe"]
+NEXT_KEY = "ctrl+f20"
+SWITCH_INTERVAL = 0.5
+EDIT_INTERVAL = 0.25
+FOCUS_STORM_INTERVAL = 1.0
+FOCUS_STORM_SIZE = 20
+DRAIN_TIMEOUT = 2.0
+CHECK_TIMEOUT = 3.0
+REPEAT_KEY = "ctrl+f18"
+REPEAT_POLICY = {"mode": "CUSTOM", "delay": 0.1, "rate": 50}
+REPEAT_HOLD = 0.6
+REPEAT_TOLERANCE = 0.2
+
+
+class FakeKeyboard:
+
+    def __init__(self, output: Callable[[str], None]) -> None:
+        """Stands in for the keyboard package, hotkeys are triggered by calling press instead of by the OS hook
+        :param output: called with everything the listener sends or writes
+        """
+        self.output = output
+        self.lock = threading.Lock()
+        self.hotkeys: Dict[str, tuple] = {}
+        self.release_hotkeys: Dict[str, tuple] = {}
+        self.held: Set[str] = set()
+
+    def add_hotkey(self, hotkey: str, callback: Callable, args=(), suppress=False, trigger_on_release=False) -> None:
+        with self.lock:
+            if trigger_on_release:
+                self.release_hotkeys[hotkey] = (callback, args)
+            else:
+                self.hotkeys[hotkey] = (callback, args)
+
+    def remove_all_hotkeys(self) -> None:
+        with self.lock:
+            self.hotkeys.clear()
+            self.release_hotkeys.clear()
+
+    def unhook_all(self) -> None:
+        self.remove_all_hotkeys()
+
+    def press_and_release(self, hotkey: str) -> None:
+        self.output(hotkey)
+
+    def write(self, text: str) -> None:
+        self.output(text)
+
+    def is_pressed(self, hotkey: str) -> bool:
+        return hotkey in self.held
+
+    def press(self, hotkey: str) -> bool:
+        """Taps a hotkey on the calling thread like the keyboard hook does
+        :param hotkey: the hotkey that is pressed and released
+        :return: True if a hotkey was registered for it
+        """
+        pressed = self.hold(hotkey)
+        self.release(hotkey)
+        return pressed
+
+    def hold(self, hotkey: str) -> bool:
+        """Presses a hotkey down without releasing it
+        :param hotkey: the hotkey that is pressed
+        :return: True if a hotkey was registered for it
+        """
+        self.held.add(hotkey)
+        return self.__trigger(self.hotkeys, hotkey)
+
+    def release(self, hotkey: str) -> None:
+        """Releases a hotkey
+        :param hotkey: the hotkey that is released
+        """
+        self.held.discard(hotkey)
+        self.__trigger(self.release_hotkeys, hotkey)
+
+    def __trigger(self, hotkeys: Dict[str, tuple], hotkey: str) -> bool:
+        with self.lock:
+            hotkey_entry = hotkeys.get(hotkey)
+        if hotkey_entry is None:
+            return False
+        callback, args = hotkey_entry
+        callback(*args)
+        return True
+
+
+class FakeForegroundHandler:
+
+    def __init__(self, configuration_managers: List[ConfigurationManager], update_hotkeys: Callable,
+                 submit: Callable) -> None:
+        """Stands in for the WindowsEventHandler, focus changes are triggered by calling focus
+        :param configuration_managers: the managers of all devices
+        :param update_hotkeys: callable to update the hotkeys after the configuration changed
+        :param submit: callable that queues an action on the action thread of the listener
+        """
+        self.configuration_managers = configuration_managers
+        self.update_hotkeys = update_hotkeys
+        self.submit = submit
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        self.stopped.wait()
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def focus(self, exe: str) -> None:
+        """Brings an executable to the foreground, without the cooldown of the real handler
+        :param exe: the name of the executable
+        """
+        self.submit(lambda: self.set_configuration(exe), coalesce=FOCUS_ACTION)
+
+    def set_configuration(self, exe: str) -> None:
+        process = exe.split('.')[0]
+        changed = [manager.set_configuration_for_process(process) for manager in self.configuration_managers]
+        if any(changed):
+            self.update_hotkeys(popup=False)
+
+
+class LoadTest:
+
+    def __init__(self, rate: float, duration: float, latency_budget: float = LATENCY_BUDGET_P99,
+                 cpu_budget: float = CPU_BUDGET, checks: bool = False, profile: bool = False) -> None:
+        """Runs the listener against a fake keyboard, a fake foreground window handler and a temporary configuration
+        directory while driving key presses, profile switches, GUI edits and focus storms at it
+        :param rate: key presses per second
+        :param duration: seconds of traffic
+        :param latency_budget: the allowed 99th percentile of the key press latency in milliseconds
+        :param cpu_budget: the allowed CPU time of the process per second of traffic
+        :param checks: if the functional checks should run before the traffic
+        :param profile: if the sampling profiler should run during the test
+        """
+        self.rate = rate
+        self.duration = duration
+        self.latency_budget = latency_budget
+        self.cpu_budget = cpu_budget
+        self.checks = checks
+        self.profile = profile
+        # created before the test changes into its temporary directory, which is deleted together with anything in it
+        self.profiler = SamplingProfiler()
+        self.keyboard = FakeKeyboard(self.__record_output)
+        self.foreground_handler: Optional[FakeForegroundHandler] = None
+        self.lock = threading.Lock()
+        self.pending: Dict[str, Deque[float]] = {}
+        self.latencies: List[float] = []
+        self.pressed = 0
+        self.unregistered = 0
+        self.switches = 0
+        self.edits = 0
+        self.focus_changes = 0
+        self.repeat_outputs: List[float] = []
+        self.repeat_result: Optional[str] = None
+        self.failures: List[str] = []
+
+    def run(self) -> int:
+        """Runs the test in a temporary directory and prints the report
+        :return: the exit code, 0 if all checks passed and all budgets were kept
+        """
+        working_directory = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix="macrokeyboard-") as directory:
+            os.chdir(directory)
+            try:
+                self.__write_configuration()
+                asyncio.run(self.__run())
+            finally:
+                os.chdir(working_directory)
+        return 1 if self.failures else 0
+
+    async def __run(self) -> None:
+        """Runs the listener and drives it from a worker thread until the traffic is done
+        """
+        macro_keyboard = MacroKeyboard(os.path.dirname(DEFAULT_FILE_NAME), self.profile, self.keyboard,
+                                       self.__create_foreground_handler, popups=False, profiler=self.profiler)
+        listener = asyncio.create_task(macro_keyboard.run())
+        await asyncio.sleep(0)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.__drive, macro_keyboard)
+        finally:
+            macro_keyboard.stop()
+            await listener
+
+    def __create_foreground_handler(self, configuration_managers: List[ConfigurationManager],
+                                    update_hotkeys: Callable, submit: Callable) -> FakeForegroundHandler:
+        self.foreground_handler = FakeForegroundHandler(configuration_managers, update_hotkeys, submit)
+        return self.foreground_handler
+
+    @staticmethod
+    def __write_configuration() -> None:
+        """Writes a single device with one configuration per profile name
+        """
+        os.makedirs(os.path.dirname(DEFAULT_FILE_NAME))
+        with open(DEVICES_FILE_NAME, "w") as file:
+            json.dump({DEFAULT_DEVICE_NAME: DEFAULT_LAYOUT}, file)
+        keys = dict(DEFAULT_CONFIG_KEYS)
+        keys[REPEAT_KEY] = dict(keys[REPEAT_KEY], repeat=REPEAT_POLICY)
+        with open(DEFAULT_FILE_NAME, "w") as file:
+            json.dump({name: keys for name in PROFILE_NAMES}, file)
+
+    def __drive(self, macro_keyboard: MacroKeyboard) -> None:
+        """Runs the functional checks, the traffic and the report, called on a worker thread
+        :param macro_keyboard: the running listener
+        """
+        editor = ConfigurationManager()
+        if self.checks:
+            self.__check(macro_keyboard, editor)
+        self.latencies.clear()
+        self.pressed = 0
+        keys = [key for key, function in DEFAULT_CONFIG_KEYS.items()
+                if function["function_type"] == FunctionType.MACRO]
+        stopping = threading.Event()
+        drivers = [
+            threading.Thread(target=self.__press_keys, args=(keys,), name="selftest-keys"),
+            threading.Thread(target=self.__repeat, args=(stopping, SWITCH_INTERVAL, self.__switch_profile),
+                             name="selftest-switches"),
+            threading.Thread(target=self.__repeat, args=(stopping, EDIT_INTERVAL, lambda: self.__edit(editor, keys)),
+                             name="selftest-edits"),
+            threading.Thread(target=self.__repeat, args=(stopping, FOCUS_STORM_INTERVAL, self.__focus_storm),
+                             name="selftest-focus"),
+        ]
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        for driver in drivers:
+            driver.start()
+        drivers[0].join()
+        stopping.set()
+        for driver in drivers[1:]:
+            driver.join()
+        self.__wait_for(lambda: not self.__count_pending(), DRAIN_TIMEOUT)
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_start
+        self.__report(macro_keyboard, elapsed, cpu)
+
+    def __check(self, macro_keyboard: MacroKeyboard, editor: ConfigurationManager) -> None:
+        """Checks that key presses, profile switches, focus changes and GUI edits reach the listener
+        :param macro_keyboard: the running listener
+        :param editor: a configuration manager editing the configuration like the GUI does
+        """
+        state = ActiveState(STATE_FILE_NAME)
+        self.__press("f13")
+        if not self.__wait_for(lambda: not self.__count_pending(), CHECK_TIMEOUT):
+            self.failures.append("key press was not executed")
+        self.keyboard.press(NEXT_KEY)
+        if not self.__wait_for(lambda: (state.read() or (0, 0, "", False))[2] == PROFILE_NAMES[1], CHECK_TIMEOUT):
+            self.failures.append("profile switch was not published")
+        self.foreground_handler.focus(f"{PROFILE_NAMES[2]}.exe")
+        if not self.__wait_for(lambda: (state.read() or (0, 0, "", False))[2] == PROFILE_NAMES[2], CHECK_TIMEOUT):
+            self.failures.append("focus change was not published")
+        editor.update_key("f14", KeyFunction("f14", FunctionType.MACRO, "selftest"))
+        manager = macro_keyboard.configuration_managers[0]
+        if not self.__wait_for(lambda: manager.configurations[0].keys["f14"].name == "selftest",
+                               CHECK_TIMEOUT):
+            self.failures.append("GUI edit was not reloaded")
+        self.__check_repeat()
+
+    def __check_repeat(self) -> None:
+        """Holds a key with a CUSTOM repeat policy and measures how many repetitions arrive and how accurately they
+        are spaced, the listener has to stop repeating when the key is released
+        """
+        policy = RepeatPolicy.from_dict(REPEAT_POLICY)
+        self.repeat_outputs.clear()
+        self.keyboard.hold(REPEAT_KEY)
+        time.sleep(REPEAT_HOLD)
+        self.keyboard.release(REPEAT_KEY)
+        released = time.perf_counter()
+        time.sleep(policy.get_interval(0) * 5)
+        outputs = list(self.repeat_outputs)
+        expected = 1 + int((REPEAT_HOLD - policy.delay) * policy.rate)
+        if abs(len(outputs) - expected) > expected * REPEAT_TOLERANCE:
+            self.failures.append(f"held key repeated {len(outputs)} times instead of {expected}")
+        if outputs and outputs[-1] > released + policy.get_interval(0):
+            self.failures.append("held key repeated after it was released")
+        deviations = sorted(abs(later - earlier - policy.get_interval(0)) * 1000
+                            for earlier, later in zip(outputs[1:], outputs[2:]))
+        self.repeat_result = f"{len(outputs)} of {expected} expected, interval deviation " \
+                             f"p50 {self.__get_percentile(deviations, 0.5):.2f} ms, " \
+                             f"max {deviations[-1] if deviations else 0:.2f} ms"
+
+    def __press_keys(self, keys: List[str]) -> None:
+        """Presses the keys one after another at the target rate, without waiting for the listener
+        :param keys: the keys to press
+        """
+        interval = 1 / self.rate
+        count = int(self.rate * self.duration)
+        next_press = time.perf_counter()
+        for index in range(count):
+            delay = next_press - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.__press(keys[index % len(keys)])
+            next_press = next_press + interval
+
+    def __press(self, key: str) -> None:
+        """Presses a key whose function sends the key itself and remembers when, to measure the latency
+        :param key: the key to press
+        """
+        with self.lock:
+            self.pending.setdefault(key, deque()).append(time.perf_counter())
+            self.pressed = self.pressed + 1
+        if not self.keyboard.press(key):
+            with self.lock:
+                self.pending[key].pop()
+                self.unregistered = self.unregistered + 1
+
+    def __record_output(self, text: str) -> None:
+        """Matches the output of the listener with the oldest pending press of the same key
+        :param text: what the listener sent
+        """
+        now = time.perf_counter()
+        if text == REPEAT_KEY:
+            self.repeat_outputs.append(now)
+        with self.lock:
+            pending = self.pending.get(text)
+            if pending:
+                self.latencies.append((now - pending.popleft()) * 1000)
+
+    def __count_pending(self) -> int:
+        with self.lock:
+            return sum(len(pending) for pending in self.pending.values())
+
+    @staticmethod
+    def __repeat(stopping: threading.Event, interval: float, action: Callable) -> None:
+        while not stopping.wait(interval):
+            action()
+
+    def __switch_profile(self) -> None:
+        self.keyboard.press(NEXT_KEY)
+        self.switches = self.switches + 1
+
+    def __edit(self, editor: ConfigurationManager, keys: List[str]) -> None:
+        """Renames a random key in the configuration file like the GUI does, its function still sends the key itself
+        :param editor: the configuration manager of the simulated GUI
+        :param keys: the keys that may be edited
+        """
+        key = random.choice(keys)
+        editor.update_key(key, KeyFunction(key, FunctionType.MACRO, f"edit {self.edits}"))
+        self.edits = self.edits + 1
+
+    def __focus_storm(self) -> None:
+        for index in range(FOCUS_STORM_SIZE):
+            self.foreground_handler.focus(FOCUS_EXECUTABLES[index % len(FOCUS_EXECUTABLES)])
+        self.focus_changes = self.focus_changes + FOCUS_STORM_SIZE
+
+    @staticmethod
+    def __wait_for(condition: Callable[[], bool], timeout: float) -> bool:
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def __report(self, macro_keyboard: MacroKeyboard, elapsed: float, cpu: float) -> None:
+        """Prints and logs the results and records every exceeded budget as failure
+        :param macro_keyboard: the listener after the traffic
+        :param elapsed: the wall time of the traffic in seconds
+        :param cpu: the CPU time of the whole process during the traffic in seconds
+        """
+        latencies = sorted(self.latencies)
+        p50 = self.__get_percentile(latencies, 0.5)
+        p99 = self.__get_percentile(latencies, 0.99)
+        lost = self.__count_pending() + self.unregistered
+        lines = [
+            f"key presses:      {self.pressed} sent at {self.rate:g}/s, {len(latencies)} executed, {lost} lost "
+            f"({self.unregistered} while the hotkeys were replaced)",
+            f"latency:          p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {latencies[-1] if latencies else 0:.2f} ms",
+            f"dropped actions:  {macro_keyboard.dropped_actions}",
+            f"other traffic:    {self.switches} profile switches, {self.edits} edits, "
+            f"{self.focus_changes} focus changes",
+            f"cpu time:         {cpu:.2f} s in {elapsed:.2f} s ({cpu / elapsed:.2f} per second)",
+        ]
+        if self.repeat_result is not None:
+            lines.append(f"held key repeat:  {self.repeat_result}")
+        if p99 > self.latency_budget:
+            self.failures.append(f"p99 latency {p99:.2f} ms exceeds {self.latency_budget:g} ms")
+        if lost or macro_keyboard.dropped_actions:
+            self.failures.append(f"{lost} key presses lost and {macro_keyboard.dropped_actions} actions dropped")
+        if cpu / elapsed > self.cpu_budget:
+            self.failures.append(f"cpu time {cpu / elapsed:.2f} per second exceeds {self.cpu_budget:g}")
+        lines += [f"FAILED: {failure}" for failure in self.failures] or ["OK"]
+        for line in lines:
+            print(line)
+            logging.info(line)
+
+    @staticmethod
+    def __get_percentile(values: List[float], fraction: float) -> float:
+        if not values:
+            return 0.0
+        return values[min(int(len(values) * fraction), len(values) - 1)]
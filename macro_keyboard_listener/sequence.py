@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set
+
+from macro_keyboard_configuration_management.constants import SEQUENCE_SEPARATOR, SEQUENCE_TIMEOUT
+from macro_keyboard_listener.timer_wheel import TimerWheel, WheelTimer
+
+
+class SequenceNode:
+    __slots__ = ("children", "action")
+
+    def __init__(self) -> None:
+        """Represents a state of the SequenceMachine, the steps pressed so far
+        """
+        self.children: Dict[str, SequenceNode] = {}
+        self.action: Optional[Callable] = None
+
+
+class SequenceMachine:
+
+    def __init__(self, sequences: Dict[str, Callable], timeout: float = SEQUENCE_TIMEOUT,
+                 timer_wheel: TimerWheel = None) -> None:
+        """Compiles all key sequences of a configuration into a single trie that advances with one lookup per key event.
+        A sequence is a list of hotkeys separated by commas, e.g. "f13, f15" for a leader key or "f14, f14" for a
+        double tap, a single hotkey is a sequence of length one
+        :param sequences: mapping of sequences to the callable that is run when the sequence was pressed
+        :param timeout: seconds after which an unfinished sequence is abandoned
+        :param timer_wheel: the wheel running the timeouts, a wheel of its own if not given
+        """
+        self.timeout = timeout
+        self.timer_wheel = timer_wheel if timer_wheel is not None else TimerWheel()
+        self.root = SequenceNode()
+        for sequence, action in sequences.items():
+            node = self.root
+            for step in self.split(sequence):
+                node = node.children.setdefault(step, SequenceNode())
+            node.action = action
+        self.lock = threading.Lock()
+        self.node = self.root
+        self.last_step = 0.0
+        self.generation = 0
+        self.timer: Optional[WheelTimer] = None
+
+    @staticmethod
+    def split(sequence: str) -> List[str]:
+        """Returns the steps of a sequence
+        :param sequence: the sequence as written in the configuration
+        :return: list of hotkeys that have to be pressed one after another
+        """
+        return [step.strip() for step in sequence.split(SEQUENCE_SEPARATOR)]
+
+    def get_steps(self) -> Set[str]:
+        """Returns all hotkeys that are used in any sequence, these need to be registered with the keyboard package
+        :return: set of hotkeys
+        """
+        steps = set()
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            steps.update(node.children.keys())
+            nodes.extend(node.children.values())
+        return steps
+
+    def feed(self, step: str) -> None:
+        """Advances the machine by one pressed hotkey and runs the action of a finished sequence
+        :param step: the hotkey that was pressed
+        """
+        now = time.monotonic()
+        actions = []
+        with self.lock:
+            if self.node is not self.root and now - self.last_step > self.timeout:
+                if self.node.action is not None:
+                    actions.append(self.node.action)
+                self.__reset()
+            node = self.node.children.get(step)
+            if node is None and self.node is not self.root:
+                if self.node.action is not None:
+                    actions.append(self.node.action)
+                self.__reset()
+                node = self.root.children.get(step)
+            if node is None:
+                logging.debug(f"No sequence continues with {step}")
+            elif node.children:
+                self.__cancel_timer()
+                self.node = node
+                self.last_step = now
+                if node.action is not None:
+                    self.timer = self.timer_wheel.schedule(self.timeout, partial(self.__expire, self.generation))
+            else:
+                actions.append(node.action)
+                self.__reset()
+        for action in actions:
+            action()
+
+    def __expire(self, generation: int) -> None:
+        """Runs the action of a sequence that was not continued before the timeout, e.g. a single tap
+        :param generation: the generation of the machine when the timer was started
+        """
+        with self.lock:
+            if generation != self.generation:
+                return
+            action = self.node.action
+            self.__reset()
+        if action is not None:
+            action()
+
+    def __reset(self) -> None:
+        """Returns the machine to its initial state, must be called with the lock held
+        """
+        self.node = self.root
+        self.__cancel_timer()
+
+    def __cancel_timer(self) -> None:
+        """Cancels the pending timeout of the current state, must be called with the lock held
+        """
+        self.generation += 1
+        if self.timer is not None:
+            self.timer_wheel.cancel(self.timer)
+            self.timer = None
@@ -0,0 +1,128 @@
+import logging
+import math
+import threading
+import time
+from typing import Callable, List, Optional
+
+from macro_keyboard_configuration_management.constants import TIMER_WHEEL_TICK, TIMER_WHEEL_SLOTS
+
+
+class WheelTimer:
+    __slots__ = ("tick", "callback", "done")
+
+    def __init__(self, tick: int, callback: Callable) -> None:
+        """A callback scheduled on the TimerWheel
+        :param tick: the tick of the wheel the callback is due at
+        :param callback: called without arguments on the thread of the wheel
+        """
+        self.tick = tick
+        self.callback = callback
+        self.done = False
+
+
+class TimerWheel:
+
+    def __init__(self, tick: float = TIMER_WHEEL_TICK, slots: int = TIMER_WHEEL_SLOTS) -> None:
+        """Hashed timer wheel running all timeouts of the listener on a single thread. Timers are put into the slot of
+        the tick they are due at, so scheduling and cancelling cost the same no matter how many timers are pending.
+        The thread sleeps until the tick of the next occupied slot, or until a timer is scheduled if none is pending,
+        and is started with the first timer
+        :param tick: seconds per tick, the resolution of the timers
+        :param slots: the number of slots, timers further away than one revolution wait in their slot for later rounds
+        """
+        self.tick = tick
+        self.slots: List[List[WheelTimer]] = [[] for _ in range(slots)]
+        self.origin = time.monotonic()
+        self.current_tick = 0
+        self.pending = 0
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.thread: Optional[threading.Thread] = None
+
+    def schedule(self, delay: float, callback: Callable) -> WheelTimer:
+        """Runs a callback after a delay, can be called from any thread including the thread of the wheel
+        :param delay: seconds until the callback is due, rounded up to the next tick
+        :param callback: called without arguments on the thread of the wheel
+        :return: WheelTimer that can be cancelled
+        """
+        with self.condition:
+            now = time.monotonic()
+            if self.pending == 0:
+                self.current_tick = max(self.current_tick, self.__get_tick(now))
+            due_tick = math.ceil((now + delay - self.origin) / self.tick)
+            timer = WheelTimer(max(due_tick, self.current_tick + 1), callback)
+            self.slots[timer.tick % len(self.slots)].append(timer)
+            self.pending = self.pending + 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.__run, name="timers", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return timer
+
+    def cancel(self, timer: WheelTimer) -> None:
+        """Cancels a timer, nothing happens if it already ran or was cancelled
+        :param timer: the timer returned by schedule
+        """
+        with self.condition:
+            if timer.done:
+                return
+            timer.done = True
+            self.slots[timer.tick % len(self.slots)].remove(timer)
+            self.pending = self.pending - 1
+
+    def stop(self) -> None:
+        """Stops the thread of the wheel, pending timers are dropped
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def __get_tick(self, now: float) -> int:
+        return int((now - self.origin) / self.tick)
+
+    def __get_next_tick(self) -> int:
+        """Returns the next tick whose slot holds timers, at most one revolution ahead, the lock has to be held
+        :return: int, the tick to wake up at
+        """
+        for offset in range(1, len(self.slots)):
+            if self.slots[(self.current_tick + offset) % len(self.slots)]:
+                return self.current_tick + offset
+        return self.current_tick + len(self.slots)
+
+    def __run(self) -> None:
+        """Advances the wheel tick by tick and runs the due callbacks outside the lock
+        """
+        while True:
+            with self.condition:
+                while self.pending == 0 and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                delay = self.origin + self.__get_next_tick() * self.tick - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    if self.stopped:
+                        return
+                due = []
+                now_tick = self.__get_tick(time.monotonic())
+                while self.current_tick < now_tick and self.pending:
+                    self.current_tick = self.current_tick + 1
+                    slot = self.slots[self.current_tick % len(self.slots)]
+                    if not slot:
+                        continue
+                    remaining = []
+                    for timer in slot:
+                        if timer.tick <= self.current_tick:
+                            timer.done = True
+                            due.append(timer)
+                        else:
+                            remaining.append(timer)
+                    self.pending = self.pending - (len(slot) - len(remaining))
+                    slot[:] = remaining
+            for timer in due:
+                try:
+                    timer.callback()
+                except Exception as e:
+                    logging.warning(e)
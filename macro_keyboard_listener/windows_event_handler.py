@@ -7,14 +7,17 @@ import time
 from win32api import OpenProcess
 from win32process import GetWindowThreadProcessId, GetModuleFileNameEx, CreateProcess
 from macro_keyboard_configuration_management.configuration_manager import ConfigurationManager
-from typing import Callable
+from macro_keyboard_configuration_management.constants import FOCUS_ACTION
+from typing import Callable, List
 
 EVENT_SYSTEM_DIALOGSTART = 0x0010
 WINEVENT_OUTOFCONTEXT = 0x0000
 EVENT_OBJECT_FOCUS = 0x8005
+WM_QUIT = 0x0012
 
 user32 = ctypes.windll.user32
 ole32 = ctypes.windll.ole32
+kernel32 = ctypes.windll.kernel32
 
 WinEventProcType = ctypes.WINFUNCTYPE(
     None,
@@ -27,18 +30,27 @@ WinEventProcType = ctypes.WINFUNCTYPE(
     ctypes.wintypes.DWORD
 )
 
-timer = 0
-last_executable = None
-
 
 class WindowsEventHandler:
-    def __init__(self, configuration_manager: ConfigurationManager, update_hotkeys: Callable) -> None:
+    def __init__(self, configuration_managers: List[ConfigurationManager], update_hotkeys: Callable,
+                 submit: Callable) -> None:
         """Handles windows events when the foreground executable changes for automatic profile change
-        :param configuration_manager:
+        :param configuration_managers: the managers of all devices, each switches to its configuration for the process
+        :param update_hotkeys: callable to update the hotkeys after the configuration changed
+        :param submit: callable that queues an action on the action thread of the listener
         """
-        self.configuration_manager = configuration_manager
+        self.configuration_managers = configuration_managers
         self.update_hotkeys = update_hotkeys
+        self.submit = submit
+        self.timer = 0
+        self.last_executable = None
+        self.thread_id = None
+        self.stopped = False
 
+    def run(self) -> None:
+        """Installs the event hook and runs the message pump of the calling thread until stop is called
+        """
+        self.thread_id = kernel32.GetCurrentThreadId()
         ole32.CoInitialize(0)
         win_event_proc = WinEventProcType(self.create_callback())
         user32.SetWinEventHook.restype = ctypes.wintypes.HANDLE
@@ -53,13 +65,22 @@ class WindowsEventHandler:
         )
         if self.hook == 0:
             self.__get_logger().warning("SetWinEventHook failed")
+            ole32.CoUninitialize()
             return
         self.__get_logger().info("WindowsEventHandler initialized")
         msg = ctypes.wintypes.MSG()
-        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) != 0:
+        while not self.stopped and user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) != 0:
             user32.DispatchMessageW(msg)
         user32.UnhookWinEvent(self.hook)
         ole32.CoUninitialize()
+        self.__get_logger().info("WindowsEventHandler stopped")
+
+    def stop(self) -> None:
+        """Ends the message pump started by run, can be called from any thread
+        """
+        self.stopped = True
+        if self.thread_id is not None:
+            user32.PostThreadMessageW(self.thread_id, WM_QUIT, 0, 0)
 
     @staticmethod
     def __get_logger():
@@ -71,8 +92,7 @@ class WindowsEventHandler:
         """
 
         def callback(h_win_event_hook, event, hwnd, id_object, id_child, dw_event_thread, dwms_event_time):
-            global timer, last_executable
-            if time.time() - timer <= 1:
+            if time.time() - self.timer <= 1:
                 self.__get_logger().info("WindowsEvent triggered but still on cooldown")
                 return
             try:
@@ -82,19 +102,20 @@ class WindowsEventHandler:
                 exe = exe.split("\\")[-1]
                 if exe == "Code.exe" or exe == "chrome.exe":
                     pass
-                if exe in os.getenv("EXE_LIST") and exe != last_executable:
-                    self.set_configuration(exe)
+                if exe in os.getenv("EXE_LIST") and exe != self.last_executable:
+                    self.submit(lambda: self.set_configuration(exe), coalesce=FOCUS_ACTION)
                 elif exe not in os.getenv("EXE_LIST"):
-                    self.set_configuration("default.exe")
+                    self.submit(lambda: self.set_configuration("default.exe"), coalesce=FOCUS_ACTION)
             except Exception as e:
                 self.__get_logger().warning(e)
         return callback
     
     def set_configuration(self, exe):
         process = exe.split('.')[0]
-        if self.configuration_manager.set_configuration_for_process(process):
+        changed = [manager.set_configuration_for_process(process) for manager in self.configuration_managers]
+        if any(changed):
             self.update_hotkeys(popup=False)
-            last_executable = exe
-            timer = time.time()
+            self.last_executable = exe
+            self.timer = time.time()
             logging.info(f"WindowsEvent triggered and set configuration for {exe}")
 